@@ -1,39 +1,135 @@
 # shai/app/flow.py
 from __future__ import annotations
-import os, platform, shutil, subprocess, sys, threading, time
+import asyncio, json, os, queue, select, selectors, shlex, subprocess, sys, threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Tuple, Dict, Any, Callable
 
-from ..llm.suggest import request_suggestions, Suggestion
-from ..util.shellparse import extract_commands, which_map
+from ..llm.suggest import request_suggestions_stream, request_suggestions_async, Suggestion
+from ..util.shellparse import BUILTINS, requires_of, which_map, which, which_generation, invalidate_which_cache
+
+try:
+    import curses
+except ImportError:  # style hooks are only called from the curses UI
+    curses = None
 
 INSTALLERS = {"pacman","yay","paru","apt","dnf","zypper","brew","flatpak","snap"}
 
 # ───────── spinner ─────────
-def _spinner_run(stop: threading.Event, label: str = "processing"):
-    frames = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+_FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+
+def _spinner_run(stop_fd: int, label: str = "processing"):
+    # frames are encoded once; each tick is a single os.write, and select() on
+    # the stop pipe doubles as the timer so stopping is immediate
+    frames = [f"\r{label} {f}".encode("utf-8") for f in _FRAMES]
+    clear = ("\r" + " "*(len(label)+8) + "\r").encode("utf-8")
+    out = sys.stdout.fileno()
     i = 0
-    while not stop.is_set():
-        sys.stdout.write(f"\r{label} {frames[i % len(frames)]}")
-        sys.stdout.flush()
-        time.sleep(0.1); i += 1
-    sys.stdout.write("\r" + " "*(len(label)+8) + "\r"); sys.stdout.flush()
+    while True:
+        os.write(out, frames[i % len(frames)])
+        ready, _, _ = select.select([stop_fd], [], [], 0.125)
+        if ready:
+            break
+        i += 1
+    os.write(out, clear)
 
-def with_spinner(fn, label: str, *args, **kwargs):
-    stop = threading.Event()
-    t = threading.Thread(target=_spinner_run, args=(stop,label), daemon=True)
+def _no_spinner():
+    pass
+
+def start_spinner(label: str) -> Callable[[], None]:
+    """
+    Start the spinner thread; returns an idempotent stop function. When stdout
+    is not a terminal no thread is started (the frames would only be noise).
+    """
+    if not sys.stdout.isatty():
+        return _no_spinner
+    sys.stdout.flush()
+    r, w = os.pipe()
+    t = threading.Thread(target=_spinner_run, args=(r,label), daemon=True)
     t.start()
+    def stop():
+        nonlocal t
+        if t is None: return
+        os.write(w, b"x"); t.join(); t = None
+        os.close(r); os.close(w)
+    return stop
+
+def with_spinner(fn, label: str, *args, **kwargs):
+    stop = start_spinner(label)
     try:
         return fn(*args, **kwargs)
     finally:
-        stop.set(); t.join()
+        stop()
 
 # ─────── context ───────
+_STDIN_KEEP = 4000         # chars of piped input the model sees
+_STDIN_TAIL = 4 * _STDIN_KEEP  # bytes that always cover them, even in UTF-8
+_OUTPUT_KEEP = 4000        # chars of command output the model sees
+_OUTPUT_TAIL = 4 * _OUTPUT_KEEP
+
 def _stdin_capture(enabled=True):
-    if not enabled: return ""
-    if sys.stdin and not sys.stdin.isatty():
-        data = sys.stdin.read()
-        return "\n".join(l.rstrip() for l in data.splitlines())[-4000:]
-    return ""
+    if not enabled or not sys.stdin or sys.stdin.isatty(): return ""
+    # only the tail matters: seek straight to it for files, and keep a bounded
+    # window while draining pipes instead of holding the whole input
+    try:
+        fd = sys.stdin.fileno()
+        try:
+            size = os.fstat(fd).st_size
+            if size > _STDIN_TAIL:
+                os.lseek(fd, size - _STDIN_TAIL, os.SEEK_SET)
+        except OSError:
+            pass  # pipe: not seekable
+        tail = bytearray()
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            tail += chunk
+            if len(tail) > 2 * _STDIN_TAIL:
+                del tail[:-_STDIN_TAIL]
+        data = tail[-_STDIN_TAIL:].decode("utf-8", "replace")
+    except Exception:
+        return ""
+    return "\n".join(l.rstrip() for l in data.splitlines())[-_STDIN_KEEP:]
+
+# environment probes don't change during a session: read them once at import
+_OS = {"linux": "Linux", "darwin": "Darwin", "win32": "Windows"}.get(sys.platform)
+if _OS is None:  # rarer platforms: ask `platform` (an extra import) for the name
+    import platform
+    _OS = platform.system()
+_ENV_SHELL = os.environ.get("SHELL")
+_ENV_EDITOR = os.environ.get("VISUAL") or os.environ.get("EDITOR")
+
+# Session-invariant part of the context, serialised once. It is sent ahead of
+# the per-turn fields so the prompt prefix stays byte-identical across requests,
+# and rebuilt only when its inputs change: the settings it reads, or the PATH
+# lookups (an install may have added a package manager).
+_STDIN: str | None = None            # piped input; None until read (it can only be read once)
+_CTX_STATIC_KEY: tuple | None = None
+_CTX_STATIC_JSON: str | None = None  # the last fragment built; sent with every request
+
+def static_context(cfg) -> str:
+    """
+    JSON fragment for os/shell/editor/package managers and piped stdin (up to
+    4000 chars, escaped here once rather than on every turn).
+    """
+    global _STDIN, _CTX_STATIC_KEY, _CTX_STATIC_JSON
+    if _STDIN is None:
+        _STDIN = _stdin_capture(cfg.use_stdin)
+    key = (tuple(cfg.pm_order), cfg.num_ctx, which_generation())
+    if key != _CTX_STATIC_KEY:
+        static = {
+            "os": _OS,
+            "shell": _ENV_SHELL,
+            "editor": _ENV_EDITOR,
+            "pm_order": cfg.pm_order,
+            "package_managers": [pm for pm in cfg.pm_order if which(pm)],
+            "num_ctx": cfg.num_ctx,
+            "stdin": _STDIN or None,
+        }
+        _CTX_STATIC_JSON = json.dumps({k: v for k, v in static.items() if v is not None},
+                                      separators=(",", ":"), ensure_ascii=False)
+        _CTX_STATIC_KEY = key
+    return _CTX_STATIC_JSON
 
 def gather_context(cfg,
                    recent_output: str = "",
@@ -41,127 +137,388 @@ def gather_context(cfg,
                    last_executed: str = "",
                    last_suggested: str = "",
                    followup: str = "") -> Dict[str, Any]:
-    """Everything here becomes JSON for the model."""
-    ctx = {
-        "os": platform.system(),
-        "shell": os.environ.get("SHELL"),
-        "editor": os.environ.get("VISUAL") or os.environ.get("EDITOR"),
-        "pm_order": cfg.pm_order,
-        "stdin": _stdin_capture(cfg.use_stdin),
-        "num_ctx": cfg.num_ctx,
+    """
+    Per-turn fields; these become JSON for the model after `static_context(cfg)`,
+    which is brought up to date here.
+    """
+    static_context(cfg)
+    return {
         "previous_query": previous_query,
         "last_executed": last_executed,
         "last_suggested": last_suggested,
-        "recent_output": (recent_output or "")[-4000:],
+        "recent_output": recent_output[-_OUTPUT_KEEP:] if recent_output else "",
         "user_followup": followup,
     }
-    ctx["package_managers"] = [pm for pm in cfg.pm_order if shutil.which(pm)]
-    return ctx
+
+def probe_package_managers(names=INSTALLERS) -> List[str]:
+    """Resolve package managers on PATH (warms the which cache); returns those found."""
+    return [pm for pm in names if which(pm)]
+
+_INSTALLER_FIRST = frozenset(INSTALLERS | {"apt-get"})
+_CMD_END = " \t|;&"
 
 def is_installer_command(cmd: str) -> bool:
-    bins = extract_commands(cmd)
-    return bool(bins and bins[0] in INSTALLERS)
+    """
+    Is the first command of the line a package manager? Like requires_of,
+    shell builtins (`cd /tmp; apt install x`, `echo hi && brew ...`) are passed
+    over to the next `|`/`;`/`&` segment; `sudo [-flags]` and `env VAR=val`
+    prefixes are skipped. A single scan over the first tokens, no regex.
+    """
+    s = cmd.lstrip()
+    while s:
+        i = 0
+        while i < len(s) and s[i] not in _CMD_END:
+            i += 1
+        tok = s[:i]
+        if tok in ("sudo", "env") or (tok.startswith("-") and tok != "-") or ("=" in tok and tok[0] != "="):
+            s = s[i:].lstrip(" \t")
+            if not s or s[0] in "|;&":
+                return False
+            continue
+        if tok and tok not in BUILTINS:
+            return tok in _INSTALLER_FIRST
+        # a builtin (or an empty segment): look at the next one
+        while i < len(s) and s[i] not in "|;&":
+            i += 1
+        s = s[i:].lstrip(" \t|;&")
+    return False
 
 # ───── suggestions / ranking ─────
-def fetch_suggestions(model: str, query: str, n: int, ctx: dict, num_ctx: int, system_prompt: str, spinner=True) -> List[Suggestion]:
-    if spinner:
-        return with_spinner(request_suggestions, "processing", model, query, n, ctx, num_ctx, system_prompt)
-    return request_suggestions(model, query, n, ctx, num_ctx, system_prompt)
-
 def stream_suggestions(model: str, query: str, n: int, ctx: dict, num_ctx: int,
                        system_prompt: str, callback: Callable[[Suggestion], None],
-                       spinner: bool = True) -> List[Suggestion]:
+                       spinner: bool = True,
+                       cancel_evt: threading.Event | None = None,
+                       parallel: int = 1) -> List[Suggestion]:
+    """
+    One request for all n suggestions; `callback` fires per item as it streams in.
+    With `parallel` > 1, n single-suggestion requests are fanned out instead.
+    """
     collected: List[Suggestion] = []
-    for i in range(max(0, n)):
-        batch = fetch_suggestions(model, query, 1, ctx, num_ctx, system_prompt, spinner and i == 0)
-        if not batch:
-            break
-        s = batch[0]
-        setattr(s, "_is_new", True)
+    if n <= 0:
+        return collected
+    if parallel > 1 and n > 1:
+        stop = start_spinner("processing") if spinner else None
+        def _emit(s: Suggestion):
+            nonlocal stop
+            if stop: stop(); stop = None
+            s._is_new = True
+            collected.append(s)
+            try:
+                callback(s)
+            except Exception:
+                pass
+        try:
+            asyncio.run(request_suggestions_async(model, query, n, ctx, num_ctx, system_prompt,
+                                                  static_json=_CTX_STATIC_JSON or "", parallel=parallel,
+                                                  on_item=_emit, cancel_evt=cancel_evt))
+        finally:
+            if stop: stop()
+        return collected
+    it = request_suggestions_stream(model, query, n, ctx, num_ctx, system_prompt,
+                                    static_json=_CTX_STATIC_JSON or "", cancel_evt=cancel_evt)
+    # spinner only covers the time to the first suggestion
+    s = with_spinner(next, "processing", it, None) if spinner else next(it, None)
+    while s is not None:
+        s._is_new = True
         collected.append(s)
         try:
             callback(s)
         except Exception:
             pass
+        s = next(it, None)
     return collected
 
-def annotate_requires(s: Suggestion) -> Tuple[List[str], int, int]:
-    req = s.requires or {}
-    missing = [b for b, p in req.items() if not p]
-    return missing, len(missing), len(s.command)
+def stream_cached(cache, model: str, query: str, n: int, ctx: dict, num_ctx: int,
+                  system_prompt: str, callback: Callable[[Suggestion], None],
+                  fresh: bool = False, **kwargs) -> List[Suggestion]:
+    """
+    `stream_suggestions` behind `cache` (a SuggestionCache, or None): a hit is
+    replayed through `callback` without touching the model; a miss is stored.
+    `fresh` skips the lookup (the system changed, e.g. after an install) but
+    still stores the new page.
+    """
+    static_json = _CTX_STATIC_JSON or ""
+    if cache is not None and not fresh:
+        hit = cache.get(model, num_ctx, n, query, system_prompt, ctx, static_json)
+        if hit:
+            for s in hit:
+                s._is_new = True
+                try:
+                    callback(s)
+                except Exception:
+                    pass
+            return hit
+    out = stream_suggestions(model, query, n, ctx, num_ctx, system_prompt, callback, **kwargs)
+    cancel_evt = kwargs.get("cancel_evt")
+    if cache is not None and not (cancel_evt is not None and cancel_evt.is_set()):
+        cache.set(model, num_ctx, n, query, system_prompt, ctx, out, static_json)
+    return out
+
+class Prefetcher:
+    """
+    Speculatively fetch the next page on a background thread while the user is
+    still looking at the table. Items are queued as they stream in and replayed
+    through the caller's callback in the UI thread on `take()`.
+    """
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._fut: Future | None = None
+        self._key: Any = None
+        self._cancel: threading.Event | None = None
+        self._queue: queue.Queue | None = None
+        self._gen = 0   # which_generation() at submit
+
+    def submit(self, key: Any, model: str, query: str, n: int, ctx: dict, num_ctx: int, system_prompt: str,
+               parallel: int = 1):
+        """Start fetching for `key` (usually the guessed ctx); drops any pending fetch."""
+        self.cancel()
+        # the static fragment is part of the request too: an install in between
+        # (new package manager) makes the page stale even for the same `key`
+        self._key, self._cancel, self._queue = (key, _CTX_STATIC_JSON), threading.Event(), queue.Queue()
+        self._gen = which_generation()
+        self._fut = self._pool.submit(stream_suggestions, model, query, n, ctx, num_ctx,
+                                      system_prompt, self._queue.put, False, self._cancel, parallel)
+
+    def take(self, key: Any, callback: Callable[[Suggestion], None]) -> List[Suggestion] | None:
+        """
+        Return the prefetched page if it was started for `key`, replaying items
+        through `callback` as they arrive. Returns None (and cancels) on a miss.
+        """
+        if self._fut is None or (key, _CTX_STATIC_JSON) != self._key:
+            self.cancel()
+            return None
+        fut, q = self._fut, self._queue
+        self._fut = self._key = self._cancel = self._queue = None
+        # an install ran since submit (e.g. the installer row was executed):
+        # items may carry PATH lookups from before it, so resolve them again
+        recheck = which_generation() != self._gen
+        while not (fut.done() and q.empty()):
+            try:
+                s = q.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if recheck:
+                s.requires = requires_of(s.command)
+            try:
+                callback(s)
+            except Exception:
+                pass
+        try:
+            return fut.result()
+        except Exception:
+            return None
+
+    def cancel(self):
+        if self._cancel is not None:
+            self._cancel.set()
+        self._fut = self._key = self._cancel = self._queue = None
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False)
+
+class StreamFeed:
+    """
+    Run one `stream_cached` on a worker thread so the table can come up before
+    the page is complete; the UI thread collects items with `poll()`.
+    """
+    _END = object()
+
+    def __init__(self, cache, model: str, query: str, n: int, ctx: dict, num_ctx: int, system_prompt: str,
+                 parallel: int = 1):
+        self._queue: queue.Queue = queue.Queue()
+        self._cancel = threading.Event()
+        self.done = False
+        self.error: BaseException | None = None   # what stopped the worker, raised by poll()
+        threading.Thread(target=self._run, daemon=True,
+                         args=(cache, model, query, n, ctx, num_ctx, system_prompt, parallel)).start()
+
+    def _run(self, cache, model, query, n, ctx, num_ctx, system_prompt, parallel):
+        try:
+            stream_cached(cache, model, query, n, ctx, num_ctx, system_prompt, self._queue.put,
+                          spinner=False, cancel_evt=self._cancel, parallel=parallel)
+        except Exception as e:
+            self.error = e   # Ollama/HTTP/JSON failure: surfaced by poll(), not swallowed
+        finally:
+            self._queue.put(self._END)
+
+    def poll(self, timeout: float | None = 0) -> List[Suggestion]:
+        """
+        Items that arrived since the last call. Waits up to `timeout` seconds
+        (None: until something arrives) for the first one; sets `done` at the end.
+        If the request failed, its exception is raised once the items that did
+        arrive have been handed out.
+        """
+        out: List[Suggestion] = []
+        block = timeout is None or timeout > 0
+        while not self.done:
+            try:
+                s = self._queue.get(block=block and not out, timeout=timeout if block else None)
+            except queue.Empty:
+                break
+            if s is self._END:
+                self.done = True
+            else:
+                out.append(s)
+        if self.done and self.error is not None and not out:
+            err, self.error = self.error, None
+            raise err
+        return out
 
-def append_new(old_items: List[Suggestion], new_items: List[Suggestion]) -> List[Suggestion]:
+    def cancel(self):
+        self._cancel.set()
+
+def append_new(old_items: List[Suggestion], new_items: List[Suggestion],
+               seen: set | None = None) -> List[Suggestion]:
+    """
+    Mark `new_items` as new and extend `old_items` with them in place, skipping
+    commands already listed. `seen` (the listed commands, kept up to date here)
+    saves rebuilding that set from `old_items` on every page.
+    """
+    if seen is None:
+        seen = {s.command for s in old_items}
     for s in new_items:
-        setattr(s, "_is_new", True)
-    return old_items + new_items
+        if s.command in seen:
+            continue
+        seen.add(s.command)
+        s._is_new = True
+        old_items.append(s)
+    return old_items
 
 # ───── rows for table ─────
-def build_rows(suggestions: List[Suggestion], show_explain: bool):
+OK = "✓✓"
+
+def _row(s: Suggestion, show_explain: bool):
+    missing = [b for b, p in (s.requires or {}).items() if not p]
+    status = "\n".join(["✗ " + b for b in missing]) if missing else OK
+    row = (s.command, status, s.explanation_min or "") if show_explain else (s.command, status)
+    return row, missing
+
+def build_rows_incremental(rows: list, misslists: list, new_mask: int, installer_mask: int,
+                           start: int, suggestions: List[Suggestion], show_explain: bool) -> Tuple[int, int]:
     """
-    Returns:
-      rows: tuples for table
-      misslists: per-row list of missing binaries
-      new_flags: per-row bool indicating newly added
+    Rebuild rows[start:] / misslists[start:] from suggestions[start:] in place;
+    rows before `start` are kept as they are. rows are the table tuples,
+    misslists the per-row missing binaries. Returns (new_mask, installer_mask):
+    bit i set iff row i is newly added / runs a package manager.
     """
-    rows, misslists, new_flags = [], [], []
-    for s in suggestions:
-        missing, _, _ = annotate_requires(s)
+    del rows[start:], misslists[start:]
+    keep = (1 << start) - 1
+    new_mask &= keep
+    installer_mask &= keep
+    for i in range(start, len(suggestions)):
+        s = suggestions[i]
+        row, missing = _row(s, show_explain)
+        rows.append(row)
         misslists.append(missing)
-        new_flags.append(bool(getattr(s, "_is_new", False)))
-        status = "✓✓" if not missing else "\n".join(f"✗ {b}" for b in missing)
-        if show_explain:
-            expl = s.explanation_min or ""
-            rows.append((s.command, status, expl))
-        else:
-            rows.append((s.command, status))
-    return rows, misslists, new_flags
+        if s._is_new:
+            new_mask |= 1 << i
+        if is_installer_command(s.command):
+            installer_mask |= 1 << i
+    return new_mask, installer_mask
 
 # ───── per-cell styling hooks ─────
-def make_style_functions(new_flags: List[bool]):
-    import curses
+def make_style_functions(mask_ref: List[int]):
+    """
+    Cell/line style hooks for grid_select. `mask_ref` is a mutable box: a
+    one-item list whose `mask_ref[0]` is the current new-row bitmask (bit i:
+    row i is new). The caller assigns `mask_ref[0]` as rows change (never
+    rebinds the list), so one pair of closures serves the whole session.
+    """
+    # attrs are resolved on the first call (color_pair() needs an initialised
+    # screen) and then live in the closure, so each cell costs no module lookups
+    CMD = NEW = GOOD = BAD = DIM = None
     def style_cell(row, col, text):
+        nonlocal CMD, NEW, GOOD, BAD, DIM
+        if CMD is None:
+            CMD, GOOD, BAD = curses.color_pair(2), curses.color_pair(3), curses.color_pair(4)
+            NEW, BAD, DIM = CMD | curses.A_BOLD, BAD | curses.A_BOLD, curses.A_DIM
         if col == 0:  # command
-            attr = curses.color_pair(2)
-            if 0 <= row < len(new_flags) and new_flags[row]:
-                attr |= curses.A_BOLD
-            return attr
+            return NEW if row >= 0 and (mask_ref[0] >> row) & 1 else CMD
         if col == 1:  # status
-            t = (text or "")
-            if t.strip().startswith("✓"):
-                return curses.color_pair(3)
-            if "✗" in t:
-                return curses.color_pair(4) | curses.A_BOLD
-        if col == 2:  # explanation
-            return curses.A_DIM
-        return 0
+            if not text:
+                return 0
+            return GOOD if text[0] == "✓" else (BAD if "✗" in text else 0)
+        return DIM if col == 2 else 0  # explanation
     def style_line(row, col, line_idx, line_text):
         return 0
     return style_cell, style_line
 
 # ───── streaming runner ─────
-def run_and_capture(cmd: str) -> tuple[int, str]:
+def _stop(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=2)
+    except subprocess.TimeoutExpired:
+        proc.kill(); proc.wait()
+
+_SHELL_CHARS = frozenset("|&;$><*?{}[]`~#()\n\\")
+
+def _argv(cmd: str) -> List[str] | None:
+    """argv for a plain `tool arg ...` command, or None when it needs /bin/sh."""
+    if not cmd.strip() or any(c in _SHELL_CHARS for c in cmd):
+        return None
+    try:
+        argv = shlex.split(cmd)
+    except ValueError:
+        return None
+    # `FOO=1 tool` and builtins (cd, export, ...) are shell business
+    if not argv or "=" in argv[0] or which(argv[0]) is None:
+        return None
+    return argv
+
+def run_and_capture(cmd: str, cancel_evt: threading.Event | None = None) -> tuple[int, str]:
     """
     Stream stdout/stderr to terminal AND capture for context.
-    Returns (exit_code, captured_output).
+    Returns (exit_code, captured_output). Only the tail of the output is kept
+    (what the model sees), so noisy commands don't grow the buffer without
+    bound. Setting `cancel_evt` stops the command.
     """
+    # The child stays in our process group on purpose: Ctrl-C from the tty then
+    # reaches every process of a shell pipeline, and tools like sudo can still
+    # prompt on the controlling terminal (a new session would lose it).
+    # stdout is a pipe, not a tty: ask Python children to stream instead of
+    # block-buffering their output until exit
+    # Simple commands are exec'd directly, saving the /bin/sh fork+parse.
+    argv = _argv(cmd)
     proc = subprocess.Popen(
-        cmd, shell=True,
+        argv or cmd, shell=argv is None,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True, bufsize=1, universal_newlines=True
+        bufsize=-1,
+        env=dict(os.environ, PYTHONUNBUFFERED="1"),
     )
-    out_lines = []
+    # raw 64 KiB reads straight through to the terminal; decode once at the end
+    fd = proc.stdout.fileno()
+    sink = sys.stdout.buffer
+    buf = bytearray()
+    sys.stdout.flush()
+    sel = selectors.DefaultSelector()
+    sel.register(fd, selectors.EVENT_READ)
     try:
-        for line in proc.stdout:
-            print(line, end="")   # live stream
-            out_lines.append(line)
+        while True:
+            if not sel.select(timeout=0.25):
+                if cancel_evt is not None and cancel_evt.is_set():
+                    _stop(proc)
+                    break
+                continue
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            sink.write(chunk); sink.flush()   # live stream
+            buf += chunk
+            if len(buf) > 2 * _OUTPUT_TAIL:
+                del buf[:-_OUTPUT_TAIL]
     except KeyboardInterrupt:
-        proc.terminate()
-        proc.wait()
-        return proc.returncode, "".join(out_lines)
+        _stop(proc)
+    finally:
+        sel.close()
+        proc.stdout.close()
     proc.wait()
-    return proc.returncode, "".join(out_lines)
+    return proc.returncode, buf[-_OUTPUT_TAIL:].decode("utf-8", "replace")[-_OUTPUT_KEEP:]
 
 def refresh_requires(s: Suggestion):
+    # something may have just been installed: drop cached PATH lookups first
+    invalidate_which_cache()
     s.requires = which_map(list((s.requires or {}).keys()))
 
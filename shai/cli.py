@@ -1,23 +1,73 @@
 # shai/cli.py
 from __future__ import annotations
-import argparse
-from typing import List
-
-from .config import load_settings, add_ignored, get_ignored
-from .ui.table import ColSpec, grid_select
-from .pm.install_ui import offer_installs_for_missing
-from .app.flow import (
-    gather_context, build_rows, make_style_functions,
-    append_new, is_installer_command, run_and_capture, refresh_requires,
-    stream_suggestions,
-)
-from .llm.suggest import ensure_ollama_running
+import argparse, itertools, sys
+from typing import List, Tuple, TYPE_CHECKING
+
+# everything but argparse (config, the thread pool, flow/suggest/table/
+# install_ui/cache) is imported inside main() once argparse is done, so
+# `shai --help` and usage errors do not pay for it
+if TYPE_CHECKING:
+    from .app.flow import Prefetcher
+    from .llm.cache import SuggestionCache
+
+# submenu, the same for every row
+ROW_MENU = ("Execute", "Comment", "Exec → Continue", "Explain", "Variations")
+
+def menu_for_row(i: int) -> Tuple[str, ...]:
+    return ROW_MENU
+
+def _make_cb(start_idx: int, show_explain: bool, seen: set):
+    """
+    Print each streamed suggestion as `i. command`, numbering from start_idx+1.
+    Commands in `seen` or already printed are skipped, as append_new will drop
+    them, so the numbers match the table rows.
+    """
+    nxt = itertools.count(start_idx + 1).__next__
+    out = sys.stdout.buffer
+    printed: set = set()
+    sys.stdout.flush()  # keep order with anything print()ed before the stream
+    def _cb(s):
+        if s.command in seen or s.command in printed:
+            return
+        printed.add(s.command)
+        if show_explain:
+            out.write(f"{nxt()}. {s.command}\n   {s.explanation_min}\n".encode("utf-8"))
+        else:
+            out.write(f"{nxt()}. {s.command}\n".encode("utf-8"))
+        out.flush()
+    return _cb
+
+def fetch_and_append(cfg, model: str, query: str, suggestions: list, num_ctx: int, show_explain: bool,
+                     prefetch: Prefetcher | None = None, cache: SuggestionCache | None = None,
+                     seen: set | None = None, fresh: bool = False, **gc_kwargs) -> list:
+    """
+    Gather context (`gc_kwargs` go to gather_context), stream a new page the size
+    of the current list and append it. Uses `prefetch`'s page if it was started
+    for the same context, else `cache` before asking the model (`fresh`: skip
+    the cache lookup). `seen` (listed commands) is shared by the printout and append_new.
+    """
+    from .app.flow import gather_context, stream_cached, append_new
+    ctx = gather_context(cfg, previous_query=query, **gc_kwargs)
+    start = len(suggestions)
+    if seen is None:
+        seen = {s.command for s in suggestions}
+    cb = _make_cb(start, show_explain, seen)
+    new_page = prefetch.take(ctx, cb) if prefetch is not None else None
+    if new_page is None:
+        new_page = stream_cached(cache, model, query, start, ctx, num_ctx, cfg.system_prompt, cb,
+                                 fresh=fresh, spinner=cfg.spinner, parallel=cfg.parallel)
+    return append_new(suggestions, new_page, seen)
 
 def main(argv: List[str] | None = None) -> int:
     ap = argparse.ArgumentParser(
         prog="shai",
         description="Natural language → CLI suggestions via Ollama.",
-        epilog="Ensure the Ollama service is running (start with 'ollama serve').",
+        epilog=(
+            "Ensure the Ollama service is running (start with 'ollama serve'). "
+            "With [model] parallel > 1 in the config, suggestions are requested concurrently; "
+            "start the server with OLLAMA_NUM_PARALLEL=<N> (and OLLAMA_MAX_LOADED_MODELS if you "
+            "switch models) so it actually decodes them side by side."
+        ),
     )
     ap.add_argument("query", nargs="*", help="what you want to do (natural language)")
     ap.add_argument("-n","--num", type=int, help="number of suggestions")
@@ -25,14 +75,31 @@ def main(argv: List[str] | None = None) -> int:
     ap.add_argument("--no-explain", action="store_true", help="hide explanations")
     ap.add_argument("--model")
     ap.add_argument("--ctx", type=int, help="override context window (num_ctx)")
+    ap.add_argument("--no-cache", action="store_true", help="always ask the model (skip the suggestion cache)")
     args = ap.parse_args(argv)
 
-    cfg = load_settings()
-    try:
-        ensure_ollama_running()
-    except RuntimeError as e:
-        print(e)
-        return 1
+    from concurrent.futures import ThreadPoolExecutor
+    from .config import load_settings, add_ignored, get_ignored
+    from .ui.table import ColSpec, grid_select
+    from .pm.install_ui import offer_installs_for_missing
+    from .app.flow import (
+        gather_context, build_rows_incremental, make_style_functions,
+        run_and_capture, refresh_requires,
+        append_new, Prefetcher, StreamFeed, probe_package_managers, with_spinner,
+    )
+    from .llm.cache import SuggestionCache
+    from .llm.suggest import ensure_ollama_running
+
+    # config load, the Ollama probe and the PATH probe for package managers are
+    # independent; run them side by side and only wait for Ollama right before
+    # the first request
+    startup = ThreadPoolExecutor(max_workers=3)
+    fut_cfg = startup.submit(load_settings)
+    fut_ollama = startup.submit(ensure_ollama_running)
+    startup.submit(probe_package_managers)
+    startup.shutdown(wait=False)
+
+    cfg = fut_cfg.result()
     model   = args.model or cfg.model
     num     = cfg.n_suggestions if args.num is None else max(1, args.num)
     num_ctx = cfg.num_ctx if args.ctx is None else max(512, int(args.ctx))
@@ -46,195 +113,206 @@ def main(argv: List[str] | None = None) -> int:
         print("Example: shai -n 3 --ctx 8192 'find big .log files and summarize'"); return 1
 
     # First batch
+    # stdin and the static fields are collected once; each turn only adds its own
     ctx = gather_context(cfg, previous_query=query)
     print("Generating suggestions...\n")
-    counter = {"i": 0}
-    def _stream_cb(s):
-        counter["i"] += 1
-        if show_explain:
-            print(f"{counter['i']}. {s.command}\n   {s.explanation_min}")
-        else:
-            print(f"{counter['i']}. {s.command}")
-    suggestions = stream_suggestions(model, query, num, ctx, num_ctx, cfg.system_prompt, _stream_cb, spinner=cfg.spinner)
+    try:
+        fut_ollama.result()
+    except RuntimeError as e:
+        print(e)
+        return 1
+    cache = (SuggestionCache(ttl=cfg.cache_ttl, semantic=cfg.cache_semantic)
+             if cfg.cache and not args.no_cache else None)
+    # the table opens at the first suggestion; the rest of the page streams into it
+    feed = StreamFeed(cache, model, query, num, ctx, num_ctx, cfg.system_prompt, parallel=cfg.parallel)
+    suggestions = with_spinner(feed.poll, "processing", None) if cfg.spinner else feed.poll(None)
     if not suggestions:
         print("No suggestions returned."); return 2
 
-    while True:
-        rows, misslists, new_flags = build_rows(suggestions, show_explain)
+    # Wider Command, narrow Status, small Explanation; show_explain never
+    # changes inside the loop, so the layout is built once
+    if show_explain:
+        colspecs = (
+            ColSpec(header="Command",     min_width=56, wrap=False, ellipsis=True),
+            ColSpec(header="Status",      min_width=12, wrap=True),
+            ColSpec(header="Explanation", min_width=24, wrap=True),
+        )
+    else:
+        colspecs = (
+            ColSpec(header="Command",     min_width=56, wrap=False, ellipsis=True),
+            ColSpec(header="Status",      min_width=16, wrap=True),
+        )
 
-        # Append SKIP row at the bottom
-        if show_explain:
-            rows.append(("[ Skip ]", "", "Exit without choosing"))
-        else:
-            rows.append(("[ Skip ]", ""))
-        misslists.append([])  # no missing tools for skip
-        new_flags.append(False)
+    skip_row = ("[ Skip ]", "", "Exit without choosing") if show_explain else ("[ Skip ]", "")
 
-        # Wider Command, narrow Status, small Explanation
-        if show_explain:
-            colspecs = [
-                ColSpec(header="Command",     min_width=56, wrap=False, ellipsis=True),
-                ColSpec(header="Status",      min_width=12, wrap=True),
-                ColSpec(header="Explanation", min_width=24, wrap=True),
-            ]
-        else:
-            colspecs = [
-                ColSpec(header="Command",     min_width=56, wrap=False, ellipsis=True),
-                ColSpec(header="Status",      min_width=16, wrap=True),
-            ]
-        style_cell, style_line = make_style_functions(new_flags)
-
-        # submenu
-        def menu_for_row(i: int):
-            return ["Execute", "Comment", "Exec → Continue", "Explain", "Variations"]
-
-        action, row_idx, sub_idx = grid_select(
-            rows, colspecs,
-            row_menu_provider=menu_for_row,
-            submenu_cols=cfg.submenu_cols,
-            title=" Suggestions ",
-            style_fn=style_cell,
-            line_style_fn=style_line,
-        )
-        if action in ("quit",) or row_idx is None:
-            print("\x1b[2mDone.\x1b[0m"); return 0
-
-        # If the user selected the SKIP row (last row), exit cleanly
-        if row_idx == len(rows) - 1:
-            print("\x1b[2mSkipped.\x1b[0m")
-            return 0
-
-        chosen = suggestions[row_idx]
-        missing = misslists[row_idx]
-
-        # Execute / Exec → Continue
-        if action == "submenu-selected" and sub_idx in (0, 2):
-            missing = [b for b in missing if b not in (cfg.ignored_bins or [])]
-            if missing:
-                installed_any = offer_installs_for_missing(missing, cfg.pm_order, cfg.n_suggestions, add_ignored)
-                cfg.ignored_bins = get_ignored()
-                if installed_any:
-                    refresh_requires(chosen)
-                continue
+    # table rows persist across iterations; only rows[stale:] are rebuilt
+    # (appended pages, or a row whose requires were refreshed)
+    rows, misslists, new_mask, installer_mask = [], [], 0, 0
+    mask_ref = [0]   # new_mask as seen by the style closures
+    style_cell, style_line = make_style_functions(mask_ref)
+    stale = 0
+    ignored = frozenset(cfg.ignored_bins or ())
+    seen = {s.command for s in suggestions}   # commands already listed
+    prefetch = Prefetcher()
+    try:
+        while True:
+            n_have = len(suggestions)
+            if stale < n_have:
+                new_mask, installer_mask = build_rows_incremental(
+                    rows, misslists, new_mask, installer_mask, stale, suggestions, show_explain)
+            stale = n_have
 
-            if sub_idx == 0:
-                # Execute: stream output; if installer, come back and prepend a NEW page
-                print("\x1b[1mRunning:\x1b[0m " + chosen.command + "\n")
-                rc, _ = run_and_capture(chosen.command)
-                if is_installer_command(chosen.command):
-                    refresh_requires(chosen)
-                    ctx = gather_context(cfg, previous_query=query)
-                    new_page: list = []
-                    counter = {"i": len(suggestions)}
-                    def _cb(s):
-                        counter["i"] += 1
-                        if show_explain:
-                            print(f"{counter['i']}. {s.command}\n   {s.explanation_min}")
-                        else:
-                            print(f"{counter['i']}. {s.command}")
-                    new_page = stream_suggestions(model, query, len(suggestions), ctx, num_ctx, cfg.system_prompt, _cb, spinner=cfg.spinner)
-                    suggestions = append_new(suggestions, new_page)
-                    continue
-                return rc
+            mask_ref[0] = new_mask
+            poll = None
+            if feed is not None and not feed.done:
+                def poll():
+                    nonlocal new_mask, installer_mask, stale
+                    new = feed.poll()
+                    if not new:
+                        return None if feed.done else False
+                    rows.pop(); misslists.pop()   # keep Skip last
+                    append_new(suggestions, new, seen)
+                    new_mask, installer_mask = build_rows_incremental(
+                        rows, misslists, new_mask, installer_mask, stale, suggestions, show_explain)
+                    stale = len(suggestions)
+                    rows.append(skip_row); misslists.append([])
+                    mask_ref[0] = new_mask
+                    return True
+
+            # speculate on the next page while the table is up; only Execute of
+            # an installer row refetches with this context (previous_query
+            # only), so don't spend a generation unless such a row is listed
+            if cfg.prefetch and poll is None and installer_mask:
+                prefetch.submit(ctx, model, query, n_have, ctx, num_ctx, cfg.system_prompt,
+                                parallel=cfg.parallel)
 
-            # Exec → Continue: stream output, then append new suggestions
-            print("\x1b[1mRunning:\x1b[0m " + chosen.command + "\n")
-            rc, out = run_and_capture(chosen.command)
-            refresh_requires(chosen)
-            try:
-                follow = input("\nWhat do you want to do next? ").strip()
-            except KeyboardInterrupt:
-                follow = ""
-            ctx = gather_context(
-                cfg,
-                recent_output=out,
-                previous_query=query,
-                last_executed=chosen.command,
-                followup=follow,
+            # Append SKIP row at the bottom (no missing tools, no bit in new_mask)
+            rows.append(skip_row); misslists.append([])
+            action, row_idx, sub_idx = grid_select(
+                rows, colspecs,
+                row_menu_provider=menu_for_row,
+                submenu_cols=cfg.submenu_cols,
+                title=" Suggestions ",
+                style_fn=style_cell,
+                line_style_fn=style_line,
+                poll=poll,
             )
-            new_page: list = []
-            counter = {"i": len(suggestions)}
-            def _cb(s):
-                counter["i"] += 1
-                if show_explain:
-                    print(f"{counter['i']}. {s.command}\n   {s.explanation_min}")
+            rows.pop(); misslists.pop()
+            n_have = len(suggestions)
+            if feed is not None:
+                feed.cancel(); feed = None  # a choice was made: the rest of the page is moot
+            if not (action == "submenu-selected" and sub_idx == 0):
+                prefetch.cancel()  # only Execute can use the guessed page
+            if action in ("quit",) or row_idx is None:
+                print("\x1b[2mDone.\x1b[0m"); return 0
+
+            # If the user selected the SKIP row (last row), exit cleanly
+            if row_idx == n_have:
+                print("\x1b[2mSkipped.\x1b[0m")
+                return 0
+
+            chosen = suggestions[row_idx]
+            missing = misslists[row_idx]
+
+            # Execute / Exec → Continue
+            if action == "submenu-selected" and sub_idx in (0, 2):
+                missing = [b for b in missing if b not in ignored]
+                if missing:
+                    installed_any = offer_installs_for_missing(missing, cfg.pm_order, cfg.n_suggestions, add_ignored)
+                    cfg.ignored_bins = get_ignored()
+                    ignored = frozenset(cfg.ignored_bins)
+                    if installed_any:
+                        refresh_requires(chosen); stale = row_idx
+                    continue
+
+                if sub_idx == 0:
+                    # Execute: stream output; if installer, come back and prepend a NEW page
+                    print("\x1b[1mRunning:\x1b[0m " + chosen.command + "\n")
+                    rc, _ = run_and_capture(chosen.command)
+                    if (installer_mask >> row_idx) & 1:
+                        refresh_requires(chosen); stale = row_idx
+                        suggestions = fetch_and_append(cfg, model, query, suggestions, num_ctx, show_explain,
+                                                       prefetch=prefetch, cache=cache, seen=seen,
+                                                       fresh=True)  # an install ran: the cached page is stale
+                        continue
+                    return rc
+
+                # Exec → Continue: stream output, then append new suggestions
+                print("\x1b[1mRunning:\x1b[0m " + chosen.command + "\n")
+                rc, out = run_and_capture(chosen.command)
+                refresh_requires(chosen); stale = row_idx
+                # the model is idle while the user types: start on the
+                # no-followup page, which is used if they just press Enter
+                if cfg.prefetch:
+                    guess_ctx = gather_context(cfg, previous_query=query, recent_output=out,
+                                               last_executed=chosen.command, followup="")
+                    prefetch.submit(guess_ctx, model, query, len(suggestions), guess_ctx, num_ctx,
+                                    cfg.system_prompt, parallel=cfg.parallel)
+                try:
+                    follow = input("\nWhat do you want to do next? ").strip()
+                except KeyboardInterrupt:
+                    follow = ""
+                suggestions = fetch_and_append(
+                    cfg, model, query, suggestions, num_ctx, show_explain,
+                    prefetch=prefetch, cache=cache, seen=seen,
+                    recent_output=out,
+                    last_executed=chosen.command,
+                    followup=follow,
+                )
+                continue
+
+            # Explain
+            if action == "submenu-selected" and sub_idx == 3:
+                # one write for the whole page
+                buf = ["\n\x1b[1mCommand:\x1b[0m " + chosen.command + "\n", "\x1b[1mExplanation:\x1b[0m\n"]
+                if getattr(chosen, "explanation_min", ""):
+                    parts = [p.strip() for p in chosen.explanation_min.split(';') if p.strip()]
+                    buf.extend(" - " + p + "\n" for p in parts)
+                    if not parts:
+                        buf.append(chosen.explanation_min + "\n")
                 else:
-                    print(f"{counter['i']}. {s.command}")
-            new_page = stream_suggestions(model, query, len(suggestions), ctx, num_ctx, cfg.system_prompt, _cb, spinner=cfg.spinner)
-            suggestions = append_new(suggestions, new_page)
-            continue
-
-        # Explain
-        if action == "submenu-selected" and sub_idx == 3:
-            print("\n\x1b[1mCommand:\x1b[0m " + chosen.command)
-            print("\x1b[1mExplanation:\x1b[0m")
-            if getattr(chosen, "explanation_min", ""):
-                parts = [p.strip() for p in chosen.explanation_min.split(';') if p.strip()]
-                for p in parts:
-                    print(" - " + p)
-                if not parts:
+                    buf.append("\x1b[2m(no explanation provided by the model)\x1b[0m\n")
+                buf.append("\x1b[1mTools:\x1b[0m\n")
+                buf.extend(f"  {b:10} {'✓ '+p if p else '✗ missing'}\n" for b, p in (chosen.requires or {}).items())
+                sys.stdout.write("".join(buf)); sys.stdout.flush()
+                input("\x1b[2m\nPress Enter to return…\x1b[0m")
+                continue
+
+            # Comment → show command & explanation, accept note, append N new items
+            if action == "submenu-selected" and sub_idx == 1:
+                print("\n\x1b[1mCommand:\x1b[0m " + chosen.command)
+                if getattr(chosen, "explanation_min", ""):
+                    print("\x1b[1mExplanation:\x1b[0m")
                     print(chosen.explanation_min)
-            else:
-                print("\x1b[2m(no explanation provided by the model)\x1b[0m")
-            print("\x1b[1mTools:\x1b[0m")
-            for b, p in (chosen.requires or {}).items():
-                print(f"  {b:10} {'✓ '+p if p else '✗ missing'}")
-            input("\x1b[2m\nPress Enter to return…\x1b[0m")
-            continue
-
-        # Comment → show command & explanation, accept note, append N new items
-        if action == "submenu-selected" and sub_idx == 1:
-            print("\n\x1b[1mCommand:\x1b[0m " + chosen.command)
-            if getattr(chosen, "explanation_min", ""):
-                print("\x1b[1mExplanation:\x1b[0m")
-                print(chosen.explanation_min)
-            try:
-                note = input("\nYour comment / correction: ").strip()
-            except KeyboardInterrupt:
-                note = ""
-            ctx = gather_context(
-                cfg,
-                previous_query=query,
-                last_suggested=chosen.command,
-                followup=note,
-            )
-            new_page: list = []
-            counter = {"i": len(suggestions)}
-            def _cb(s):
-                counter["i"] += 1
-                if show_explain:
-                    print(f"{counter['i']}. {s.command}\n   {s.explanation_min}")
-                else:
-                    print(f"{counter['i']}. {s.command}")
-            new_page = stream_suggestions(model, query, len(suggestions), ctx, num_ctx, cfg.system_prompt, _cb, spinner=cfg.spinner)
-            suggestions = append_new(suggestions, new_page)
-            continue
-
-        # Variations: ask for new variants of selected command
-        if action == "submenu-selected" and sub_idx == 4:
-            ctx = gather_context(
-                cfg,
-                previous_query=query,
-                last_suggested=chosen.command,
-                followup="variants",
-            )
-            new_page: list = []
-            counter = {"i": len(suggestions)}
-            def _cb(s):
-                counter["i"] += 1
-                if show_explain:
-                    print(f"{counter['i']}. {s.command}\n   {s.explanation_min}")
-                else:
-                    print(f"{counter['i']}. {s.command}")
-            new_page = stream_suggestions(model, query, len(suggestions), ctx, num_ctx, cfg.system_prompt, _cb, spinner=cfg.spinner)
-            suggestions = append_new(suggestions, new_page)
-            continue
-
-        # fallback
-        if action == "row-selected":
-            print("\x1b[1mRunning:\x1b[0m " + chosen.command + "\n")
-            rc, _ = run_and_capture(chosen.command)
-            return rc
+                try:
+                    note = input("\nYour comment / correction: ").strip()
+                except KeyboardInterrupt:
+                    note = ""
+                suggestions = fetch_and_append(
+                    cfg, model, query, suggestions, num_ctx, show_explain,
+                    cache=cache, seen=seen,
+                    last_suggested=chosen.command,
+                    followup=note,
+                )
+                continue
+
+            # Variations: ask for new variants of selected command
+            if action == "submenu-selected" and sub_idx == 4:
+                suggestions = fetch_and_append(
+                    cfg, model, query, suggestions, num_ctx, show_explain,
+                    cache=cache, seen=seen,
+                    last_suggested=chosen.command,
+                    followup="variants",
+                )
+                continue
+
+            # fallback
+            if action == "row-selected":
+                print("\x1b[1mRunning:\x1b[0m " + chosen.command + "\n")
+                rc, _ = run_and_capture(chosen.command)
+                return rc
+    finally:
+        prefetch.shutdown()
 
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -1,8 +1,15 @@
 from __future__ import annotations
+import bisect
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import os
 
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
 DEFAULT_PROMPT = (
     "You are a Linux CLI assistant.\n"
     "Return STRICT JSON:\n\n"
@@ -46,6 +53,21 @@ def _parse_tomlish(text: str) -> dict:
             data[k] = val
     return data
 
+def _parse_config(text: str) -> dict:
+    """Real TOML when tomllib is available (C-accelerated, handles inline comments),
+    else — or if the file is not valid TOML — the tolerant parser above."""
+    if tomllib is not None:
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            pass
+    return _parse_tomlish(text)
+
+@lru_cache(maxsize=1)
+def _read_config(path: str, mtime_ns: int) -> dict:
+    # keyed on mtime so an edited config is picked up by the next load
+    return _parse_config(Path(path).read_text(encoding="utf-8"))
+
 def _xdg_config_home() -> Path:
     return Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
 
@@ -54,10 +76,14 @@ DEFAULT_TEXT = """\
 [model]
 name = "qwen2.5-coder:3b"
 ctx = 8192   # context window tokens for the model
+parallel = 1
 
 [suggestions]
 n = 3
 explain = false
+# prefetch: request the likely next page while you choose (extra model load;
+# keep it off if the server decodes one request at a time)
+prefetch = false
 
 [ui]
 spinner = true
@@ -66,6 +92,14 @@ spinner = true
 history_lines = 30
 use_stdin = true
 
+# cache: replay a stored page for the same query in the same context instead
+# of asking the model again. The key does not include the working directory.
+# Pages, with your queries and any piped stdin, are kept in ~/.shai_cache.
+[cache]
+enabled = false
+semantic = false
+ttl_days = 7
+
 [pm]
 order = "pacman,apt,dnf,zypper,brew,flatpak,snap,yay,paru"
 
@@ -77,12 +111,17 @@ file = "prompt.txt"
 class Settings:
     model: str = "qwen2.5-coder:3b"
     num_ctx: int = 8192                 # << only knob for LLM now
+    parallel: int = 1                   # >1: fan out one request per suggestion
     n_suggestions: int = 3
     explain: bool = False
+    prefetch: bool = False              # opt-in: speculative requests cost model time
     spinner: bool = True
     submenu_cols: int = 3
     history_lines: int = 30
     use_stdin: bool = True
+    cache: bool = False                 # opt-in: pages are written to ~/.shai_cache
+    cache_semantic: bool = False
+    cache_ttl: int = 7 * 86400          # seconds
     pm_order: list[str] | None = None
     system_prompt: str = DEFAULT_PROMPT
     ignored_bins: list[str] | None = None
@@ -113,26 +152,51 @@ def ensure_default_config() -> Path:
 def _ignored_path() -> Path:
     return _xdg_config_home() / "shai" / "ignored.txt"
 
+# ignored binaries, sorted; reloaded only when the file's mtime changes
+_ignored_cache: list[str] | None = None
+_ignored_mtime: int | None = None
+
+def _load_ignored() -> list[str]:
+    global _ignored_cache, _ignored_mtime
+    p = _ignored_path()
+    try:
+        mtime = p.stat().st_mtime_ns
+    except OSError:
+        _ignored_cache, _ignored_mtime = [], None
+        return _ignored_cache
+    if _ignored_cache is None or mtime != _ignored_mtime:
+        lines = (b.strip() for b in p.read_text(encoding="utf-8").splitlines())
+        _ignored_cache, _ignored_mtime = sorted({b for b in lines if b}), mtime
+    return _ignored_cache
+
 def add_ignored(bin_name: str) -> None:
+    global _ignored_mtime
+    ignored = _load_ignored()
+    i = bisect.bisect_left(ignored, bin_name)
+    if i < len(ignored) and ignored[i] == bin_name:
+        return
+    # append just the new name instead of rewriting the sorted file
     p = _ignored_path()
-    existing = set()
-    if p.exists():
-        existing.update(b.strip() for b in p.read_text(encoding="utf-8").splitlines() if b.strip())
-    if bin_name not in existing:
-        existing.add(bin_name)
-        p.write_text("\n".join(sorted(existing)) + "\n", encoding="utf-8")
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with open(p, "a+b") as f:
+        lead = b""
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            lead = b"" if f.read(1) == b"\n" else b"\n"   # hand-edited, no final newline
+        f.write(lead + bin_name.encode("utf-8") + b"\n")
+    ignored.insert(i, bin_name)
+    _ignored_mtime = p.stat().st_mtime_ns
 
 def get_ignored() -> list[str]:
-    p = _ignored_path()
-    if p.exists():
-        return [b.strip() for b in p.read_text(encoding="utf-8").splitlines() if b.strip()]
-    return []
+    return list(_load_ignored())
 
 def load_settings() -> Settings:
     ensure_default_config()
     p = _config_path()
-    text = p.read_text(encoding="utf-8") if p.exists() else DEFAULT_TEXT
-    d = _parse_tomlish(text)
+    try:
+        d = _read_config(str(p), p.stat().st_mtime_ns)
+    except OSError:
+        d = _parse_config(DEFAULT_TEXT)
 
     s = Settings()
 
@@ -140,11 +204,14 @@ def load_settings() -> Settings:
     s.model = str(m.get("name", s.model))
     try: s.num_ctx = int(m.get("ctx", s.num_ctx))
     except Exception: pass
+    try: s.parallel = max(1, int(m.get("parallel", s.parallel)))
+    except Exception: pass
 
     sg = d.get("suggestions", {})
     try: s.n_suggestions = int(sg.get("n", s.n_suggestions))
     except Exception: pass
     s.explain = bool(sg.get("explain", s.explain))
+    s.prefetch = bool(sg.get("prefetch", s.prefetch))
 
     ui = d.get("ui", {})
     s.spinner = bool(ui.get("spinner", s.spinner))
@@ -156,6 +223,12 @@ def load_settings() -> Settings:
     except Exception: pass
     s.use_stdin = bool(cx.get("use_stdin", s.use_stdin))
 
+    ch = d.get("cache", {})
+    s.cache = bool(ch.get("enabled", s.cache))
+    s.cache_semantic = bool(ch.get("semantic", s.cache_semantic))
+    try: s.cache_ttl = max(0, int(float(ch.get("ttl_days", s.cache_ttl / 86400)) * 86400))
+    except Exception: pass
+
     pm = d.get("pm", {})
     order = pm.get("order", "")
     if isinstance(order, str) and order.strip():
@@ -174,10 +247,6 @@ def load_settings() -> Settings:
     else:
         s.system_prompt = pr.get("system", DEFAULT_PROMPT)
 
-    ignored_p = _ignored_path()
-    if ignored_p.exists():
-        s.ignored_bins = [b.strip() for b in ignored_p.read_text(encoding="utf-8").splitlines() if b.strip()]
-    else:
-        s.ignored_bins = []
+    s.ignored_bins = get_ignored()
 
     return s
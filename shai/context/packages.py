@@ -12,26 +12,32 @@ Public API:
     search_best_provider(term: str, pm_order: list[str], max_results: int = 8)
         -> tuple[str, str, list[tuple[str,str]]]
         # returns (pm_used, search_cmd_str, results)
+    search_in_order(term: str, pms: list[str], max_results: int = 8)
+        -> iterator of (pm, search_cmd_str, results), searched concurrently
     install_command(pm: str, pkg: str) -> str
     is_known_pm(name: str) -> bool
 """
 
 from __future__ import annotations
 import re
-import shutil
 import subprocess
-from typing import Dict, List, Tuple
+import threading
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from ..util.shellparse import which   # shared PATH cache, reset after installs
 
 # ---------------- Registry ----------------
 
-# How to run a search (by "term") for each package manager
+# How to run a search (by "term") for each package manager. Searches run in
+# the background with no stdin, so managers that can ask questions (repo key
+# import, helper prompts) are told not to.
 SEARCH_CMDS: Dict[str, List[str]] = {
-    "pacman": ["pacman", "-Ss"],
-    "yay":    ["yay", "-Ss"],
-    "paru":   ["paru", "-Ss"],
+    "pacman": ["pacman", "-Ss", "--noconfirm"],
+    "yay":    ["yay", "-Ss", "--noconfirm"],
+    "paru":   ["paru", "-Ss", "--noconfirm"],
     "apt":    ["apt", "search"],
-    "dnf":    ["dnf", "search"],
-    "zypper": ["zypper", "search"],
+    "dnf":    ["dnf", "-y", "search"],
+    "zypper": ["zypper", "--non-interactive", "search"],
     "brew":   ["brew", "search"],
     "flatpak":["flatpak", "search"],
     "snap":   ["snap", "find"],
@@ -75,120 +81,147 @@ def available_pms(pm_order: List[str]) -> List[str]:
     """
     out: List[str] = []
     for pm in pm_order:
-        if pm in SEARCH_CMDS and shutil.which(pm):
+        if pm in SEARCH_CMDS and pm not in out and which(pm):
             out.append(pm)
     # Include any other known PMs present that weren't listed in config (rare)
     for pm in SEARCH_CMDS:
-        if pm not in out and shutil.which(pm):
+        if pm not in out and which(pm):
             out.append(pm)
     return out
 
 # ---------------- Running & parsing searches ----------------
 
 def _run(cmd: List[str], timeout: int = 10) -> str:
+    # binary capture decoded once; stderr (progress/warnings) is never parsed.
+    # No stdin: these run alongside curses and the foreground install, and a
+    # prompt (hidden, with stderr discarded) would steal keys or sit until timeout
     try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-        return r.stdout
+        r = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                           timeout=timeout, bufsize=1 << 16)
+        return r.stdout.decode("utf-8", "replace")
     except Exception as e:
         return f"__ERROR__ {e}"
 
-def _parse_results(pm: str, out: str) -> List[Tuple[str, str]]:
+_RE_PACMAN = re.compile(r"^\s*([-\w]+)/([-\w+.@]+)\s+([\w.+:-]+)")
+_RE_APT    = re.compile(r"^([a-z0-9.+-]+)\/")
+_RE_DNF    = re.compile(r"^([a-z0-9.+_-]+)(?:\.[a-z0-9_]+)?\s*:\s*(.+)$", re.I)
+_RE_ZYPPER = re.compile(r"^\s*[|+]\s")
+_RE_BREW   = re.compile(r"^[a-z0-9.+-]+$", re.I)
+
+def _parse_pacman(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    # pacman/yay/paru
+    # repo/pkg  version
+    #     description...
+    i = 0
+    while i < len(lines):
+        m = _RE_PACMAN.match(lines[i])
+        if m:
+            pkg = m.group(2)
+            desc = ""
+            if i+1 < len(lines) and lines[i+1].startswith("    "):
+                desc = lines[i+1].strip()
+                i += 1
+            yield (pkg, desc)
+        i += 1
+
+def _parse_apt(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    # apt search
+    # ripgrep/jammy 13.0.0-1 amd64
+    #   fast line-oriented search tool
+    i = 0
+    while i < len(lines):
+        m = _RE_APT.match(lines[i])
+        if m:
+            pkg = m.group(1)
+            desc = ""
+            if i+1 < len(lines) and lines[i+1].startswith(" "):
+                desc = lines[i+1].strip()
+                i += 1
+            yield (pkg, desc)
+        i += 1
+
+def _parse_dnf(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    # dnf search
+    # ripgrep.x86_64 : A fast grep alternative
+    match = _RE_DNF.match
+    for m in map(match, lines):
+        if m:
+            yield (m.group(1), m.group(2))
+
+def _parse_zypper(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    # zypper search (table)
+    for line in lines:
+        if _RE_ZYPPER.match(line):
+            cols = [c.strip() for c in line.strip("| ").split("|")]
+            if len(cols) >= 2 and cols[1].lower() != "name":
+                name = cols[1]
+                desc = cols[-1] if len(cols) >= 3 else ""
+                yield (name, desc)
+
+def _parse_brew(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    # brew search prints names in columns and sometimes headers with '==>'
+    for line in lines:
+        if line.strip().startswith("==>"):
+            continue
+        for name in line.split():
+            if _RE_BREW.match(name):
+                yield (name, "")
+
+def _split_cols(line: str) -> List[str]:
+    # columns in aligned output are separated by 2+ spaces; str.split on the
+    # literal gap covers that without the regex engine
+    return [c.strip() for c in line.split("  ") if c.strip()]
+
+def _parse_flatpak(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    # 'flatpak search foo' prints rows; take first column as the app id/name
+    # Format varies with versions; we do a simple split and keep first token
+    for line in lines:
+        parts = line.split()
+        if parts and line[:4].lower() != "name":
+            yield (parts[0], " ".join(parts[1:]))
+
+def _parse_snap(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    # snap find:
+    # Name   Version   Publisher   Notes   Summary
+    if lines and "Name" in lines[0] and "Summary" in lines[0]:
+        for line in lines[1:]:
+            cols = _split_cols(line)
+            if cols:
+                name = cols[0]
+                summary = cols[-1] if len(cols) >= 2 else ""
+                yield (name, summary)
+
+# parsers are generators, so _parse_results can stop once it has enough
+_PARSERS: Dict[str, Callable[[List[str]], Iterator[Tuple[str, str]]]] = {
+    "pacman": _parse_pacman,
+    "apt":    _parse_apt,
+    "dnf":    _parse_dnf,
+    "zypper": _parse_zypper,
+    "brew":   _parse_brew,
+    "flatpak":_parse_flatpak,
+    "snap":   _parse_snap,
+}
+
+def _parse_results(pm: str, out: str, limit: int | None = None) -> List[Tuple[str, str]]:
     """
-    Parse human-readable search output into a list of (package_name, description).
+    Parse human-readable search output into a list of (package_name, description),
+    at most `limit` distinct packages.
     """
     if out.startswith("__ERROR__") or not out.strip():
         return []
 
-    style = PM_INFO.get(pm, {}).get("parse", "")
-    lines = [l.rstrip() for l in out.splitlines()]
-    res: List[Tuple[str,str]] = []
-
-    if style == "pacman":
-        # pacman/yay/paru
-        # repo/pkg  version
-        #     description...
-        i = 0
-        while i < len(lines):
-            m = re.match(r"^\s*([-\w]+)/([-\w+.@]+)\s+([\w.+:-]+)", lines[i])
-            if m:
-                pkg = m.group(2)
-                desc = ""
-                if i+1 < len(lines) and lines[i+1].startswith("    "):
-                    desc = lines[i+1].strip()
-                    i += 1
-                res.append((pkg, desc))
-            i += 1
-
-    elif style == "apt":
-        # apt search
-        # ripgrep/jammy 13.0.0-1 amd64
-        #   fast line-oriented search tool
-        i = 0
-        while i < len(lines):
-            m = re.match(r"^([a-z0-9.+-]+)\/", lines[i])
-            if m:
-                pkg = m.group(1)
-                desc = ""
-                if i+1 < len(lines) and lines[i+1].startswith(" "):
-                    desc = lines[i+1].strip()
-                    i += 1
-                res.append((pkg, desc))
-            i += 1
-
-    elif style == "dnf":
-        # dnf search
-        # ripgrep.x86_64 : A fast grep alternative
-        for line in lines:
-            m = re.match(r"^([a-z0-9.+_-]+)(?:\.[a-z0-9_]+)?\s*:\s*(.+)$", line, re.I)
-            if m:
-                res.append((m.group(1), m.group(2)))
-
-    elif style == "zypper":
-        # zypper search (table)
-        for line in lines:
-            if re.match(r"^\s*[|+]\s", line):
-                cols = [c.strip() for c in line.strip("| ").split("|")]
-                if len(cols) >= 2 and cols[1].lower() != "name":
-                    name = cols[1]
-                    desc = cols[-1] if len(cols) >= 3 else ""
-                    res.append((name, desc))
-
-    elif style == "brew":
-        # brew search prints names in columns and sometimes headers with '==>'
-        for line in lines:
-            if line.strip().startswith("==>"):
-                continue
-            for name in line.split():
-                if re.match(r"^[a-z0-9.+-]+$", name, re.I):
-                    res.append((name, ""))
-
-    elif style == "flatpak":
-        # 'flatpak search foo' prints rows; take first column as the app id/name
-        # Format varies with versions; we do a simple split and keep first token
-        for line in lines:
-            parts = line.split()
-            if parts and not line.lower().startswith("name"):
-                res.append((parts[0], " ".join(parts[1:])))
-
-    elif style == "snap":
-        # snap find:
-        # Name   Version   Publisher   Notes   Summary
-        if lines and "Name" in lines[0] and "Summary" in lines[0]:
-            for line in lines[1:]:
-                cols = re.split(r"\s{2,}", line.strip())
-                if cols:
-                    name = cols[0]
-                    summary = cols[-1] if len(cols) >= 2 else ""
-                    res.append((name, summary))
+    parser = _PARSERS.get(PM_INFO.get(pm, {}).get("parse", ""))
+    if parser is None:
+        return []
 
     # de-duplicate while preserving order
-    seen = set()
-    uniq: List[Tuple[str,str]] = []
-    for p, d in res:
-        if p not in seen:
-            seen.add(p)
-            uniq.append((p, d))
-    return uniq
+    uniq: Dict[str, str] = {}
+    for p, d in parser([l.rstrip() for l in out.splitlines()]):
+        if p not in uniq:
+            uniq[p] = d
+            if limit is not None and len(uniq) >= limit:
+                break
+    return list(uniq.items())
 
 def search_one(pm: str, term: str, max_results: int = 8) -> Tuple[str, List[Tuple[str,str]]]:
     """
@@ -200,17 +233,41 @@ def search_one(pm: str, term: str, max_results: int = 8) -> Tuple[str, List[Tupl
         return "", []
     cmd = base + [term]
     out = _run(cmd)
-    results = _parse_results(pm, out)[:max_results]
+    results = _parse_results(pm, out, max_results)
     return (" ".join(cmd), results)
 
+def search_in_order(term: str, pms: List[str], max_results: int = 8) -> Iterator[Tuple[str, str, List[Tuple[str,str]]]]:
+    """
+    Search all `pms` at once (each search is a subprocess, often network-bound)
+    and yield (pm, search_cmd_str, results) in the given order, each as soon as
+    it and the ones before it have finished. Stop iterating to abandon the rest.
+    The searches start when this is called, not on first iteration, so a
+    caller can start the next term's searches ahead of time.
+    """
+    slots: List[Tuple[str, List[Tuple[str,str]]]] = [("", [])] * len(pms)
+    done = [threading.Event() for _ in pms]
+    def work(i: int, pm: str):
+        try:
+            slots[i] = search_one(pm, term, max_results=max_results)
+        finally:
+            done[i].set()
+    # daemon threads: an abandoned slow search must not hold up exit
+    for i, pm in enumerate(pms):
+        threading.Thread(target=work, args=(i, pm), daemon=True).start()
+    return _in_order(pms, slots, done)
+
+def _in_order(pms, slots, done):
+    for i, pm in enumerate(pms):
+        done[i].wait()
+        yield (pm, *slots[i])
+
 def search_best_provider(term: str, pm_order: List[str], max_results: int = 8) -> Tuple[str, str, List[Tuple[str,str]]]:
     """
-    Try PMs in *configured order*, filtered to installed ones.
+    Try PMs in *configured order*, filtered to installed ones (searched concurrently).
     Return the first PM with results:
         (pm_used, search_cmd_str, [(pkg, desc), ...])
     """
-    for pm in available_pms(pm_order):
-        search_cmd, results = search_one(pm, term, max_results=max_results)
+    for pm, search_cmd, results in search_in_order(term, available_pms(pm_order), max_results):
         if results:
             return pm, search_cmd, results
     return "", "", []
@@ -0,0 +1,181 @@
+# shai/llm/cache.py
+"""
+Response cache for suggestion pages.
+
+- Exact hits: key = blake2b-128 over (model, num_ctx, n, query, system prompt, context).
+- Semantic hits (optional): a query whose MiniLM embedding is close enough
+  (cosine >= SEM_THRESHOLD) to a cached query *with the same context* reuses
+  that page, MeanCache-style.
+
+Storage is `diskcache` under ~/.shai_cache/; without it, one JSON file per
+key in the same directory, holding the entry's expiry time.
+`sentence-transformers` is optional.
+
+Off unless `[cache] enabled = true`: a hit replays the stored page without
+asking the model, for as long as the TTL allows. The key does not include the
+working directory or anything else outside the context dict, and stored pages
+hold the user's queries and piped stdin.
+
+Public API:
+    SuggestionCache(directory=CACHE_DIR, ttl=TTL, semantic=False)   # ttl in seconds
+        .get(model, num_ctx, n, query, system_prompt, ctx, static_json="") -> list[Suggestion] | None
+        .set(model, num_ctx, n, query, system_prompt, ctx, suggestions, static_json="")
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .suggest import Suggestion
+from ..util.shellparse import requires_of
+
+try:
+    import diskcache
+except Exception:
+    diskcache = None
+
+CACHE_DIR = Path.home() / ".shai_cache"
+TTL = 7 * 86400
+SEM_THRESHOLD = 0.92
+SEM_MODEL = "all-MiniLM-L6-v2"
+HOT_SIZE = 8   # recent pages also kept in memory, in front of the store
+
+def _digest(*parts: Any) -> str:
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+class _JsonStore:
+    """Minimal diskcache stand-in: <dir>/<key>.json holding the value and its expiry time."""
+    def __init__(self, directory: Path):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self._dir / (key.replace(":", "_") + ".json")
+
+    def get(self, key: str, default=None):
+        p = self._path(key)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return default
+        if not isinstance(entry, dict) or "value" not in entry:
+            return default   # unknown layout: treat as a miss, the next set replaces it
+        if entry.get("expire") is not None and time.time() > entry["expire"]:
+            p.unlink(missing_ok=True)
+            return default
+        return entry["value"]
+
+    def set(self, key: str, value: Any, expire: float | None = None) -> None:
+        # like diskcache: `expire` is seconds from now, None keeps the entry
+        p = self._path(key)
+        tmp = p.with_suffix(".tmp")
+        entry = {"expire": time.time() + expire if expire else None, "value": value}
+        try:
+            tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, p)
+        except OSError:
+            pass
+
+def _dump(suggestions: List[Suggestion]) -> list:
+    return [{"command": s.command, "explanation_min": s.explanation_min} for s in suggestions]
+
+def _load(items: list) -> List[Suggestion]:
+    # tool availability is re-checked: it may have changed since the page was stored
+    return [Suggestion(command=d["command"], explanation_min=d.get("explanation_min", ""),
+                       requires=requires_of(d["command"]))
+            for d in items]
+
+class SuggestionCache:
+    def __init__(self, directory: Path = CACHE_DIR, ttl: int = TTL, semantic: bool = False):
+        self.ttl = ttl or None   # 0: keep entries until evicted
+        self._db = None
+        try:
+            self._db = diskcache.Cache(str(directory)) if diskcache is not None else _JsonStore(directory)
+        except Exception:
+            self._db = None
+        self._semantic = semantic
+        self._encoder = None   # loaded on first semantic lookup
+        self._hot: "OrderedDict[str, list]" = OrderedDict()
+
+    def _remember(self, key: str, items: list) -> None:
+        self._hot[key] = items
+        self._hot.move_to_end(key)
+        while len(self._hot) > HOT_SIZE:
+            self._hot.popitem(last=False)
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    # ---------- keys ----------
+    @staticmethod
+    def _ctx_key(model: str, num_ctx: int, n: int, system_prompt: str, ctx: Dict[str, Any], static_json: str) -> str:
+        return _digest(model, num_ctx, n, system_prompt, static_json, ctx)
+
+    # ---------- semantic ----------
+    def _embed(self, query: str):
+        if not self._semantic:
+            return None
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(SEM_MODEL)
+            except Exception:
+                self._semantic = False
+                return None
+        return self._encoder.encode(query, convert_to_tensor=True, normalize_embeddings=True)
+
+    def _semantic_get(self, ctx_key: str, query: str) -> str | None:
+        entries = self._db.get("sem:" + ctx_key) or []
+        if not entries:
+            return None
+        emb = self._embed(query)
+        if emb is None:
+            return None
+        try:
+            import torch
+            from sentence_transformers import util
+            corpus = torch.tensor([e[0] for e in entries], device=emb.device)
+            hit = util.semantic_search(emb, corpus, top_k=1)[0]
+        except Exception:
+            return None
+        if hit and hit[0]["score"] >= SEM_THRESHOLD:
+            return entries[hit[0]["corpus_id"]][1]
+        return None
+
+    # ---------- get / set ----------
+    def get(self, model: str, num_ctx: int, n: int, query: str, system_prompt: str,
+            ctx: Dict[str, Any], static_json: str = "") -> List[Suggestion] | None:
+        if self._db is None:
+            return None
+        ctx_key = self._ctx_key(model, num_ctx, n, system_prompt, ctx, static_json)
+        key = _digest(ctx_key, query)
+        items = self._hot.get(key)
+        if items is None:
+            items = self._db.get(key)
+            if items is None and self._semantic:
+                sem_key = self._semantic_get(ctx_key, query)
+                items = self._db.get(sem_key) if sem_key else None
+            if items:
+                self._remember(key, items)
+        return _load(items) if items else None
+
+    def set(self, model: str, num_ctx: int, n: int, query: str, system_prompt: str,
+            ctx: Dict[str, Any], suggestions: List[Suggestion], static_json: str = "") -> None:
+        if self._db is None or not suggestions:
+            return
+        ctx_key = self._ctx_key(model, num_ctx, n, system_prompt, ctx, static_json)
+        key = _digest(ctx_key, query)
+        items = _dump(suggestions)
+        self._remember(key, items)
+        self._db.set(key, items, expire=self.ttl)
+        emb = self._embed(query)
+        if emb is not None:
+            entries = self._db.get("sem:" + ctx_key) or []
+            entries.append((emb.tolist(), key))
+            self._db.set("sem:" + ctx_key, entries[-256:], expire=self.ttl)
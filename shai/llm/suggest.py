@@ -1,9 +1,9 @@
-from dataclasses import dataclass
-from typing import List, Dict, Any
-import json, os
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Iterator
+import asyncio, functools, http.client, itertools, json, os, re, threading, time
+from urllib.parse import urlsplit
 
-from ..util.shellparse import extract_commands, which_map
-import urllib.request
+from ..util.shellparse import requires_of
 
 try:
     import ollama as pyollama
@@ -12,30 +12,113 @@ except Exception:
     pyollama = None
     HAS_OLLAMA = False
 
+try:
+    from ollama import AsyncClient
+except Exception:
+    AsyncClient = None
+
+try:
+    import orjson   # optional: faster encode/decode of prompts and replies
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _compact(o: Any) -> str:
+        return orjson.dumps(o, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    def _body(o: Any) -> bytes:
+        return orjson.dumps(o, option=orjson.OPT_NON_STR_KEYS)
+    _loads = orjson.loads
+else:
+    def _compact(o: Any) -> str:
+        return json.dumps(o, separators=(",", ":"), ensure_ascii=False)
+    def _body(o: Any) -> bytes:
+        return _compact(o).encode("utf-8")
+    _loads = json.loads
+
+try:
+    import simdjson   # optional: lazy reply parsing, only the two used fields materialise
+except ImportError:
+    simdjson = None
+_SIMD = threading.local()   # a Parser reuses its buffer; one per thread (feed, prefetch, main)
+
 OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
 
+# ───── HTTP fallback: one keep-alive connection per thread and host ─────
+_CONNS = threading.local()
+
+def _drop_conn(host: str) -> None:
+    conn = getattr(_CONNS, "by_host", {}).pop(host, None)
+    if conn is not None:
+        conn.close()
+
+def _request(method: str, path: str, body: bytes | None = None, timeout: float = 60,
+             host: str = OLLAMA_HOST) -> http.client.HTTPResponse:
+    """
+    Issue a request over this thread's pooled connection, so the TCP handshake is
+    paid once per session. The response must be read to the end (or the
+    connection dropped) before the next request on this thread.
+    """
+    conns = _CONNS.__dict__.setdefault("by_host", {})
+    for attempt in (0, 1):
+        conn = conns.get(host)
+        reused = conn is not None
+        if conn is None:
+            # OLLAMA_HOST may be a bare host[:port], as the ollama client accepts
+            u = urlsplit(host if "://" in host else "http://" + host)
+            cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+            port = u.port or (None if "://" in host else 11434)
+            conn = conns[host] = cls(u.hostname or "127.0.0.1", port, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(method, path, body, {"Content-Type": "application/json"} if body else {})
+            resp = conn.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            _drop_conn(host)
+            if reused and attempt == 0:
+                continue   # the server closed the idle connection: reconnect once
+            raise
+        except OSError:
+            _drop_conn(host)
+            raise
+        if resp.status >= 400:
+            resp.read()
+            raise OSError(f"{method} {path}: HTTP {resp.status}")
+        return resp
+
+_ALIVE_TTL = 5.0                   # seconds a successful probe is trusted
+_alive_at: Dict[str, float] = {}     # host -> monotonic time of the last successful probe
+
 def is_ollama_running(host: str = OLLAMA_HOST) -> bool:
-    try:
-        if HAS_OLLAMA:
-            pyollama.list()
-            return True
-        urllib.request.urlopen(host + "/api/tags", timeout=2)
+    # /api/tags over the pooled connection for both paths: pyollama.list()
+    # hits the same endpoint but decodes the whole model list into objects
+    if time.monotonic() - _alive_at.get(host, -_ALIVE_TTL) < _ALIVE_TTL:
         return True
+    try:
+        _request("GET", "/api/tags", timeout=2, host=host).read()
     except Exception:
+        _alive_at.pop(host, None)
         return False
+    _alive_at[host] = time.monotonic()
+    return True
 
 def ensure_ollama_running():
     if not is_ollama_running():
         raise RuntimeError(
             f"Ollama is not running at {OLLAMA_HOST}.\n"
-            "Start it with 'ollama serve' or see https://ollama.ai for installation instructions."
+            "Start it with 'ollama serve' or see https://ollama.ai for installation instructions.\n"
+            "With [model] parallel > 1, start it as 'OLLAMA_NUM_PARALLEL=<N> ollama serve'."
         )
 
-@dataclass
+@dataclass(slots=True)
 class Suggestion:
     command: str
     explanation_min: str = ""
     requires: Dict[str, str] | None = None
+    # UI-only: set when the item joins the on-screen list; not part of the
+    # suggestion's value (constructor, equality, repr)
+    _is_new: bool = field(default=False, init=False, compare=False, repr=False)
 
 DEFAULT_SYSTEM_PROMPT = (
     "You are a Linux CLI assistant.\n"
@@ -57,55 +140,194 @@ def _chat(model: str, messages: list, num_ctx: int, force_json: bool = True) ->
         if force_json: kwargs["format"] = "json"
         r = pyollama.chat(**kwargs)
         return r.get("message", {}).get("content", "")
-    # HTTP fallback
-    import urllib.request
-    body = {"model": model, "messages": messages, "options": options}
+    # HTTP fallback (the endpoint streams unless told otherwise)
+    body = {"model": model, "messages": messages, "options": options, "stream": False}
     if force_json: body["format"] = "json"
-    req = urllib.request.Request(OLLAMA_HOST + "/api/chat",
-                                 data=json.dumps(body).encode("utf-8"),
-                                 headers={"Content-Type": "application/json"})
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
-        return data.get("message", {}).get("content", "")
+    data = _loads(_request("POST", "/api/chat", _body(body)).read())
+    return data.get("message", {}).get("content", "")
+
+def _chat_stream(model: str, messages: list, num_ctx: int, force_json: bool = True,
+                 host: str = OLLAMA_HOST) -> Iterator[str]:
+    """Like `_chat`, but yields content pieces as the model produces them."""
+    options = {"num_ctx": int(num_ctx)}
+    if HAS_OLLAMA:
+        kwargs = {"model": model, "messages": messages, "options": options, "stream": True}
+        if force_json: kwargs["format"] = "json"
+        for part in pyollama.chat(**kwargs):
+            yield part.get("message", {}).get("content", "")
+        return
+    # HTTP fallback: /api/chat streams NDJSON, one object per line
+    body = {"model": model, "messages": messages, "options": options, "stream": True}
+    if force_json: body["format"] = "json"
+    resp = _request("POST", "/api/chat", _body(body), host=host)
+    try:
+        for line in resp:
+            if not line.strip(): continue
+            data = _loads(line)
+            yield data.get("message", {}).get("content", "")
+            if data.get("done"):
+                resp.read()   # only the terminating chunk is left; keeps the connection reusable
+                break
+    finally:
+        if not resp.isclosed():
+            _drop_conn(host)   # abandoned mid-reply (cancelled): can't be reused
+
+async def _chat_async(model: str, messages: list, num_ctx: int, force_json: bool = True, client=None) -> str:
+    """`_chat` for the event loop: native AsyncClient if available, else a worker thread."""
+    if client is None:
+        return await asyncio.to_thread(_chat, model, messages, num_ctx, force_json)
+    kwargs = {"model": model, "messages": messages, "options": {"num_ctx": int(num_ctx)}}
+    if force_json: kwargs["format"] = "json"
+    r = await client.chat(**kwargs)
+    return r.get("message", {}).get("content", "")
 
 def _strip_code_fences(s: str) -> str:
     s = s.strip()
     if s.startswith("```"):
-        s = s.split("```", 2)
-        if len(s) >= 3:
-            return s[1].split("\n", 1)[-1] if s[1].startswith(("bash","sh")) else s[1]
+        parts = s.split("```", 2)
+        if len(parts) >= 3:
+            return parts[1].split("\n", 1)[-1] if parts[1].startswith(("bash","sh")) else parts[1]
     return s
 
-def request_suggestions(model: str, query: str, n: int, context: Dict[str,Any], num_ctx: int,
-                        system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> List[Suggestion]:
-    user_payload = {"N": n, "USER_QUERY": query, "CONTEXT": context}
-    messages = [{"role":"system","content": system_prompt},
-                {"role":"user","content": json.dumps(user_payload, ensure_ascii=False)}]
-    raw = _chat(model, messages, num_ctx, True)
+@functools.lru_cache(maxsize=4)
+def _system_message(system_prompt: str) -> Dict[str, str]:
+    # one shared dict per prompt for the whole session; never mutated
+    return {"role": "system", "content": system_prompt}
+
+def _messages(query: str, n: int, context: Dict[str,Any], system_prompt: str, static_json: str = "") -> list:
+    """
+    `static_json` is a pre-serialised JSON object (session-invariant context).
+    It is spliced in front of `context` so that part of the prompt is identical
+    on every turn and only the per-turn fields are re-encoded.
+    """
+    parts = [p[1:-1] for p in (static_json, _compact(context)) if len(p) > 2]
+    payload = ('{"CONTEXT":{' + ",".join(parts) + '},'
+               + '"N":' + _compact(n) + ',"USER_QUERY":' + _compact(query) + "}")
+    return [_system_message(system_prompt),
+            {"role":"user","content": payload}]
+
+def _to_suggestion(it: Any) -> Suggestion | None:
+    if not isinstance(it, dict): return None
+    cmd = _strip_code_fences(it.get("command") or "").strip()
+    if not cmd: return None
+    sug = Suggestion(command=cmd, explanation_min=(it.get("explanation_min") or "").strip())
+    sug.requires = requires_of(sug.command)
+    return sug
+
+# a non-blank line minus surrounding backticks/whitespace; blank and
+# fence-only lines never match
+_LINE_RE = re.compile(r"^[`\s]*([^`\s](?:.*[^`\s])?)[`\s]*$", re.MULTILINE)
 
+def _parse_fallback(raw: str, n: int) -> List[Suggestion]:
+    """Parse code fences/plain lines when the model did not return usable JSON."""
+    # one lazy scan that stops after n lines instead of splitting/stripping it all
+    return [Suggestion(command=l, explanation_min="", requires=requires_of(l))
+            for l in (m.group(1) for m in itertools.islice(_LINE_RE.finditer(_strip_code_fences(raw)), n))]
+
+def _simd_items(raw: str, n: int) -> List[dict]:
+    parser = getattr(_SIMD, "parser", None)
+    if parser is None:
+        parser = _SIMD.parser = simdjson.Parser()
+    doc = parser.parse(raw.encode("utf-8"))
+    arr = doc.get("suggestions") if isinstance(doc, simdjson.Object) else None
+    if not isinstance(arr, simdjson.Array):
+        return []
+    # copy out the fields we read: the proxies die with the parser's next document
+    return [{"command": it.get("command"), "explanation_min": it.get("explanation_min")}
+            if isinstance(it, simdjson.Object) else None
+            for _, it in zip(range(n), arr)]
+
+def _parse_reply(raw: str, n: int) -> List[Suggestion]:
     out: List[Suggestion] = []
     # JSON-first
     try:
-        data = json.loads(raw)
-        items = data.get("suggestions", [])[:n]
+        if simdjson is not None:
+            items = _simd_items(raw, n)
+        else:
+            items = _loads(raw).get("suggestions", [])[:n]
         for it in items:
-            cmd = _strip_code_fences((it or {}).get("command","")).strip()
-            if not cmd: continue
-            sug = Suggestion(command=cmd, explanation_min=(it or {}).get("explanation_min","").strip())
-            bins = extract_commands(sug.command)
-            sug.requires = which_map(bins)
-            out.append(sug)
+            sug = _to_suggestion(it)
+            if sug: out.append(sug)
         if out:
             return out
     except Exception:
         pass
 
     # fallback: parse code fences/plain lines
-    text = _strip_code_fences(raw)
-    lines = [l.strip("` ").strip() for l in text.splitlines() if l.strip()]
-    for l in lines[:n]:
-        if not l: continue
-        sug = Suggestion(command=l, explanation_min="")
-        sug.requires = which_map(extract_commands(l))
-        out.append(sug)
+    return _parse_fallback(raw, n)
+
+_DECODER = json.JSONDecoder()
+
+def request_suggestions_stream(model: str, query: str, n: int, context: Dict[str,Any], num_ctx: int,
+                               system_prompt: str = DEFAULT_SYSTEM_PROMPT, static_json: str = "",
+                               cancel_evt: threading.Event | None = None) -> Iterator[Suggestion]:
+    """
+    One streamed request for all n suggestions. Each element of the
+    `suggestions` array is parsed and yielded as soon as its closing brace
+    arrives, so the prompt/context prefill is paid once instead of n times.
+    Setting `cancel_evt` stops reading (and drops the connection) at the next token.
+    """
+    buf, pos, count = "", -1, 0
+    for piece in _chat_stream(model, _messages(query, n, context, system_prompt, static_json), num_ctx, True):
+        if cancel_evt is not None and cancel_evt.is_set():
+            return
+        buf += piece
+        if pos < 0:
+            k = buf.find("[")
+            if k < 0: continue
+            pos = k + 1
+        while count < n:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf) or buf[pos] != "{":
+                break
+            try:
+                it, pos = _DECODER.raw_decode(buf, pos)
+            except ValueError:
+                break  # object still incomplete, wait for more tokens
+            sug = _to_suggestion(it)
+            if sug:
+                count += 1
+                yield sug
+        if count >= n:
+            return
+    if count == 0:
+        # nothing streamed out of the array: reparse the whole reply as before
+        yield from _parse_reply(buf, n)
+
+async def request_suggestions_async(model: str, query: str, n: int, context: Dict[str,Any], num_ctx: int,
+                                    system_prompt: str = DEFAULT_SYSTEM_PROMPT, static_json: str = "",
+                                    parallel: int = 2,
+                                    on_item: Callable[[Suggestion], None] | None = None,
+                                    cancel_evt: threading.Event | None = None) -> List[Suggestion]:
+    """
+    Fan out n one-suggestion requests, at most `parallel` in flight. Only pays
+    off when the server decodes concurrently (OLLAMA_NUM_PARALLEL > 1).
+    Items are deduplicated by command and handed to `on_item` as each finishes.
+    """
+    client = AsyncClient() if HAS_OLLAMA and AsyncClient is not None else None
+    messages = _messages(query, 1, context, system_prompt, static_json)
+    gate = asyncio.Semaphore(max(1, parallel))
+    async def one() -> str:
+        async with gate:
+            return await _chat_async(model, messages, num_ctx, True, client)
+    tasks = [asyncio.ensure_future(one()) for _ in range(max(0, n))]
+    out: List[Suggestion] = []
+    seen = set()
+    try:
+        for fut in asyncio.as_completed(tasks):
+            try:
+                raw = await fut
+            except Exception:
+                continue
+            if cancel_evt is not None and cancel_evt.is_set():
+                break
+            for sug in _parse_reply(raw, 1):
+                if sug.command in seen: continue
+                seen.add(sug.command)
+                out.append(sug)
+                if on_item: on_item(sug)
+    finally:
+        for t in tasks:
+            t.cancel()
     return out
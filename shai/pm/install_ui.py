@@ -1,24 +1,32 @@
 # shai/pm/install_ui.py
 from __future__ import annotations
-import subprocess
+import os, subprocess, sys
 from typing import List, Tuple, Callable, Optional
 
-from ..context.packages import available_pms, search_best_provider, install_command
+from ..context.packages import available_pms, search_in_order, install_command
 from ..ui.table import ColSpec, grid_select
 
 def _run_stream(cmd: str) -> int:
+    # raw bytes in 64 KiB blocks, passed straight through: no per-line decode,
+    # and progress bars keep their bare \r
     proc = subprocess.Popen(
         cmd, shell=True,
-        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-        text=True, bufsize=1, universal_newlines=True
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0,
     )
+    fd, sink = proc.stdout.fileno(), sys.stdout.buffer
+    sys.stdout.flush()
     try:
-        for line in proc.stdout:
-            print(line, end="")
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            sink.write(chunk); sink.flush()
     except KeyboardInterrupt:
         proc.terminate()
         proc.wait()
         return proc.returncode
+    finally:
+        proc.stdout.close()
     return proc.wait()
 
 def offer_installs_for_missing(
@@ -39,13 +47,20 @@ def offer_installs_for_missing(
         input("\x1b[2mPress Enter to return…\x1b[0m")
         return False
 
-    for binary in missing_bins:
+    # all managers are searched at once per binary, and the next binary's
+    # searches run while the user is still choosing for this one
+    pending = search_in_order(missing_bins[0], managers, max_results=max_pkgs) if missing_bins else None
+    for k, binary in enumerate(missing_bins):
         tried_msgs: List[str] = []
         results: List[Tuple[str,str]] = []
         pm_used, search_cmd = None, None
 
-        for pm in managers:
-            pm_used, search_cmd, results = search_best_provider(binary, [pm], max_results=max_pkgs)
+        searches = pending
+        pending = (search_in_order(missing_bins[k+1], managers, max_results=max_pkgs)
+                   if k + 1 < len(missing_bins) else None)
+        # report them in configured order
+        for pm, search_cmd, results in searches:
+            pm_used = pm
             if results:
                 break
             else:
@@ -1,9 +1,9 @@
 # shai/ui/table.py
-import curses, locale, shutil
+import curses, functools, locale, unicodedata
 from dataclasses import dataclass
 from typing import List, Sequence, Tuple, Optional, Dict, Any, Callable
 
-from ..util.ansi import visible_len, crop_visible, ljust_visible, ANSI_RE
+from ..util.ansi import visible_len, crop_visible, ljust_visible, ANSI_RE, term_size
 
 locale.setlocale(locale.LC_ALL, "")
 
@@ -17,16 +17,22 @@ class ColSpec:
 
 # ── helpers ────────────────────────────────────────────────────────────────────
 def strip_ansi(s: str) -> str:
-    return ANSI_RE.sub("", s or "")
+    if not s or "\x1b" not in s:   # the usual case: nothing to strip, skip the regex
+        return s or ""
+    return ANSI_RE.sub("", s)
 
 def _wrap_visible(text: str, width: int) -> list[str]:
     """Wrap text to width, counting only visible characters (ignoring ANSI)."""
     if not text:
         return [""]
     words = text.split()
+    vlen = visible_len
+    if vlen(text) <= width:   # fits already (most cells): just normalise the spacing
+        return [" ".join(words)] if words else [""]
     lines, cur, cur_len = [], "", 0
+    append = lines.append
     for w in words:
-        lw = visible_len(w)
+        lw = vlen(w)
         add = (1 if cur else 0) + lw
         if cur_len + add <= width:
             if cur:
@@ -35,171 +41,334 @@ def _wrap_visible(text: str, width: int) -> list[str]:
             else:
                 cur, cur_len = w, lw
         else:
-            lines.append(cur)
+            if cur:
+                append(cur)
+            if lw > width > 0 and "\x1b" not in w:
+                # a token wider than the column (long path/URL): hard-break it
+                # instead of leaving the tail for addnstr to cut off
+                cut = len(w) - len(w) % width
+                lines.extend(w[i:i+width] for i in range(0, cut, width))
+                w = w[cut:]; lw = len(w)
             cur, cur_len = w, lw
     if cur:
-        lines.append(cur)
+        append(cur)
     return lines or [""]
 
 # ── core renderer ──────────────────────────────────────────────────────────────
-def render_table(
-    stdscr: Optional["curses._CursesWindow"],
+def compute_layout(
     rows: Sequence[Sequence[str]],
     colspecs: Sequence[ColSpec],
+    width: int,
     *,
-    start_y: int = 0,
     start_x: int = 0,
     gap: int = 2,
-    highlight_row: Optional[int] = None,
-    highlight_cell: Optional[Tuple[int,int]] = None,
-    header: Optional[str] = None,          # ignored content; presence means "draw header row"
-    header_attr: int = 0,
-    normal_attr: int = 0,
-    highlight_attr: int = 0,
-    max_height: Optional[int] = None,
-    # NEW: styling hooks (optional)
-    style_fn: Optional[Callable[[int,int,str], int]] = None,           # row, col, full cell text -> attrs
-    line_style_fn: Optional[Callable[[int,int,int,str], int]] = None,  # row, col, line_idx, line_text -> attrs
+    max_lines: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
-    Draw a wrapping table with curses-safe text (ANSI stripped).
-    Returns layout info: widths, col_starts, row_heights, total_height.
+    Column widths and wrapped, padded cell lines for `rows` at terminal `width`.
+    Depends only on the cell text, so it can be reused until rows or width change.
+    Returns widths, col_starts, row_heights, total_height, plus the
+    wrapped_cells/cell_text used by `draw_table`. Widths always account for
+    every row; with `max_lines`, wrapping stops once that many lines are
+    filled (rows past it could not be drawn anyway) and the row lists cover
+    only the rows wrapped so far.
     """
-    if stdscr is not None:
-        h, w = stdscr.getmaxyx()
-    else:
-        ts = shutil.get_terminal_size((100,24)); w, h = ts.columns, ts.lines
-    if max_height is None: max_height = h - start_y
     ncols = len(colspecs)
     assert all(len(r) == ncols for r in rows), "row width != colspecs"
 
     headers = [strip_ansi(cs.header) for cs in colspecs]
     widths = [max(1, cs.min_width) for cs in colspecs]
-    available = max(0, w - start_x)
+    available = max(0, width - start_x)
     total_gap = gap * (ncols - 1)
     col_space = max(1, available - total_gap)
 
-    # estimate desired widths from headers + samples
-    samples: List[List[int]] = [[] for _ in range(ncols)]
-    for row in rows:
-        for j, cell in enumerate(row):
-            cell_plain = strip_ansi(cell)
-            samples[j].append(min(max(visible_len(cell_plain), visible_len(headers[j])), 200))
-    ideal = []
-    for j, cs in enumerate(colspecs):
-        target = max(cs.min_width, min(max(samples[j]) if samples[j] else cs.min_width, cs.max_width or 10**6))
-        ideal.append(target)
+    # every cell is stripped once; both the width estimate and wrapping use it
+    plain_rows = [[strip_ansi(str(cell)) for cell in row] for row in rows]
+
+    # estimate desired widths from headers + samples (already stripped: len is the visible width)
+    # one C-level max per column; no per-cell list of lengths
+    if plain_rows:
+        col_max = [min(max(max(map(len, col)), len(headers[j])), 200)
+                   for j, col in enumerate(zip(*plain_rows))]
+    else:
+        col_max = [cs.min_width for cs in colspecs]
+    ideal = [max(cs.min_width, min(col_max[j], cs.max_width or 10**6)) for j, cs in enumerate(colspecs)]
 
     # scale to available width
     sum_ideal = sum(ideal) or 1
     if sum_ideal <= col_space:
         widths = [min(ideal[j], (colspecs[j].max_width or ideal[j])) for j in range(ncols)]
+        # leftover goes to the wrapping columns in order, each up to its cap
         leftover = col_space - sum(widths)
-        wrap_cols = [j for j, cs in enumerate(colspecs) if cs.wrap]
-        k = 0
-        while leftover > 0 and wrap_cols:
-            j = wrap_cols[k % len(wrap_cols)]
-            cap = (colspecs[j].max_width or col_space)
-            add = min(leftover, max(0, cap - widths[j]))
-            if add == 0:
-                k += 1
-                if k > 3*len(wrap_cols): break
-                continue
-            widths[j] += add; leftover -= add; k += 1
+        for j, cs in enumerate(colspecs):
+            if leftover <= 0: break
+            if cs.wrap:
+                add = min(leftover, max(0, (cs.max_width or col_space) - widths[j]))
+                widths[j] += add; leftover -= add
     else:
         widths = [max(colspecs[j].min_width, int(col_space * (ideal[j] / sum_ideal))) for j in range(ncols)]
-        diff = col_space - sum(widths); j = 0
-        while diff != 0 and ncols:
-            step = 1 if diff > 0 else -1
+        diff = col_space - sum(widths)
+        if diff and ncols:
+            # ±1 per column, round-robin over the wrapping columns (all if none
+            # wrap) until diff is used up, within each column's min/max; worked
+            # out as whole rounds plus a partial one rather than step by step
             candidates = [k for k, cs in enumerate(colspecs) if cs.wrap] or list(range(ncols))
-            idx = candidates[j % len(candidates)]
-            neww = widths[idx] + step
-            if neww >= colspecs[idx].min_width and (colspecs[idx].max_width is None or neww <= colspecs[idx].max_width):
-                widths[idx] = neww; diff -= step
-            j += 1
-            if j > 10000: break
+            need = abs(diff)
+            if diff > 0:
+                room = [need if colspecs[k].max_width is None else max(0, colspecs[k].max_width - widths[k])
+                        for k in candidates]
+            else:
+                room = [max(0, widths[k] - colspecs[k].min_width) for k in candidates]
+            room = [min(r, need) for r in room]
+            if sum(room) <= need:
+                give = room
+            else:
+                lo, hi = 0, max(room)   # most whole rounds that fit in `need`
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if sum(min(r, mid) for r in room) <= need: lo = mid
+                    else: hi = mid - 1
+                give = [min(r, lo) for r in room]
+                rest = need - sum(give)
+                for n, r in enumerate(room):
+                    if rest and r > lo: give[n] += 1; rest -= 1
+            step = 1 if diff > 0 else -1
+            for k, g in zip(candidates, give):
+                widths[k] += step * g
 
     col_starts = [start_x]
     for j in range(1, ncols):
         col_starts.append(col_starts[-1] + widths[j-1] + gap)
 
-    # wrap cells (ANSI stripped)
+    # wrap cells (ANSI stripped); lines are padded to the column width here,
+    # once, rather than on every draw. cell_text is what the style hook sees.
+    wrap_flags = tuple(cs.wrap for cs in colspecs)
+    ellipsis_flags = tuple(cs.ellipsis for cs in colspecs)
     wrapped_cells: List[List[List[str]]] = []
+    cell_text: List[List[str]] = []
     row_heights: List[int] = []
-    for row in rows:
+    # cells are ANSI-stripped above, so width == len and str.ljust pads them
+    filled = 0
+    for row in plain_rows:
+        if max_lines is not None and filled >= max_lines:
+            break
         lines_per_col: List[List[str]] = []
+        texts: List[str] = []
         row_h = 1
-        for j, cell in enumerate(row):
-            cs = colspecs[j]
-            plain = strip_ansi(str(cell))
-            if cs.wrap:
+        for j, plain in enumerate(row):
+            if wrap_flags[j]:
                 lines: List[str] = []
                 for part in plain.splitlines():
                     lines.extend(_wrap_visible(part, widths[j]))
                 lines = lines or [""]
+                texts.append("\n".join(lines))
+                wd = widths[j]
+                lines = [l.ljust(wd) for l in lines]
             else:
-                s = crop_visible(plain, widths[j], ellipsis=cs.ellipsis)
-                lines = [ljust_visible(s, widths[j])]
+                s = crop_visible(plain, widths[j], ellipsis=ellipsis_flags[j])
+                lines = [s.ljust(widths[j])]
+                texts.append(lines[0])
             lines_per_col.append(lines)
             row_h = max(row_h, len(lines))
         wrapped_cells.append(lines_per_col)
+        cell_text.append(texts)
         row_heights.append(row_h)
+        filled += row_h
 
-    total_height = sum(row_heights)
+    return {"widths": widths, "col_starts": col_starts, "row_heights": row_heights,
+            "total_height": filled, "wrapped_cells": wrapped_cells, "cell_text": cell_text,
+            "width": width, "max_lines": max_lines}
 
-    # draw
-    if stdscr is not None:
-        y = start_y
-
-        # aligned header row (uses column grid)
-        if header is not None:
-            for j, cs in enumerate(colspecs):
-                s = crop_visible(cs.header, widths[j], ellipsis=False)
-                s = ljust_visible(s, widths[j])
-                stdscr.addnstr(y, col_starts[j], s, widths[j], header_attr | curses.A_BOLD)
-            y += 1
+def _cell_attr(i: int, j: int, k: int, text: str, line: str, normal_attr: int,
+               style_fn: Optional[Callable[[int,int,str], int]],
+               line_style_fn: Optional[Callable[[int,int,int,str], int]]) -> int:
+    attr = normal_attr
+    if style_fn:
+        try:
+            attr |= int(style_fn(i, j, text))
+        except Exception:
+            pass
+    if line_style_fn:
+        try:
+            attr |= int(line_style_fn(i, j, k, line))
+        except Exception:
+            pass
+    return attr
 
-        # rows
-        for i, (lines_per_col, rheight) in enumerate(zip(wrapped_cells, row_heights)):
-            row_is_highlight = (highlight_row is not None and i == highlight_row)
-            for k in range(rheight):
-                if y >= start_y + max_height:
-                    break
-                for j in range(ncols):
-                    xs = col_starts[j]
-                    # choose style
-                    base_attr = normal_attr
-                    if style_fn:
-                        try:
-                            base_attr = base_attr | int(style_fn(i, j, "\n".join(lines_per_col[j])))
-                        except Exception:
-                            pass
-                    if line_style_fn:
-                        try:
-                            base_attr = base_attr | int(line_style_fn(i, j, k, (lines_per_col[j][k] if k < len(lines_per_col[j]) else "")))
-                        except Exception:
-                            pass
-                    if highlight_cell and highlight_cell == (i, j):
-                        base_attr = highlight_attr
-                    if row_is_highlight:
-                        base_attr = highlight_attr
-
-                    # content
-                    s = lines_per_col[j][k] if k < len(lines_per_col[j]) else ""
-                    if colspecs[j].wrap:
-                        s = ljust_visible(s, widths[j])
-                    else:
-                        s = crop_visible(s, widths[j], ellipsis=colspecs[j].ellipsis)
-                        s = ljust_visible(s, widths[j])
-
-                    stdscr.addnstr(y, xs, s, widths[j], base_attr)
-                y += 1
-            if y >= start_y + max_height:
+def draw_table(
+    stdscr: "curses._CursesWindow",
+    layout: Dict[str, Any],
+    colspecs: Sequence[ColSpec],
+    *,
+    start_y: int = 0,
+    max_height: int,
+    highlight_row: Optional[int] = None,
+    highlight_cell: Optional[Tuple[int,int]] = None,
+    header: Optional[str] = None,
+    header_attr: int = 0,
+    normal_attr: int = 0,
+    highlight_attr: int = 0,
+    style_fn: Optional[Callable[[int,int,str], int]] = None,
+    line_style_fn: Optional[Callable[[int,int,int,str], int]] = None,
+) -> List[int]:
+    """
+    Draw a layout from `compute_layout`; only attributes are worked out here.
+    Returns the screen y of each row that made it on screen (for `restyle_row`).
+    """
+    widths, col_starts = layout["widths"], layout["col_starts"]
+    ncols = len(colspecs)
+    blanks = [" " * wd for wd in widths]
+    y = start_y
+    bottom = start_y + max_height
+
+    # aligned header row (uses column grid)
+    if header is not None:
+        for j, cs in enumerate(colspecs):
+            s = crop_visible(cs.header, widths[j], ellipsis=False)
+            s = ljust_visible(s, widths[j])
+            stdscr.addnstr(y, col_starts[j], s, widths[j], header_attr | curses.A_BOLD)
+        y += 1
+
+    # rows
+    hi_i, hi_j = highlight_cell if highlight_cell else (-1, -1)   # int compares per cell
+    row_y: List[int] = []
+    for i, (lines_per_col, texts, rheight) in enumerate(
+            zip(layout["wrapped_cells"], layout["cell_text"], layout["row_heights"])):
+        if y >= bottom:
+            break
+        row_y.append(y)
+        row_is_highlight = (highlight_row is not None and i == highlight_row)
+        for k in range(rheight):
+            if y >= bottom:
                 break
+            segs, attrs = [], []
+            for j in range(ncols):
+                lines = lines_per_col[j]
+                s = lines[k] if k < len(lines) else blanks[j]
+                if row_is_highlight or (i == hi_i and j == hi_j):
+                    attrs.append(highlight_attr)
+                else:
+                    attrs.append(_cell_attr(i, j, k, texts[j], s.rstrip() if k < len(lines) else "",
+                                            normal_attr, style_fn, line_style_fn))
+                segs.append(s[:widths[j]])
+            line = _joined_line(layout, segs, attrs)
+            if line is not None:   # one attribute for the whole line: one curses call
+                stdscr.addnstr(y, col_starts[0], line, len(line), attrs[0])
+            else:
+                for j in range(ncols):
+                    stdscr.addnstr(y, col_starts[j], segs[j], widths[j], attrs[j])
+            y += 1
+    return row_y
 
-    return {"widths": widths, "col_starts": col_starts, "row_heights": row_heights, "total_height": total_height}
+# East Asian widths that take one cell (ambiguous ones do outside CJK locales)
+_ONE_CELL = frozenset(("N", "Na", "H", "A"))
+
+@functools.lru_cache(maxsize=1024)
+def _single_width(line: str) -> bool:
+    """Every char of `line` takes exactly one terminal cell (✓/✗/… do)."""
+    if line.isascii():
+        return True
+    eaw, combining = unicodedata.east_asian_width, unicodedata.combining
+    return all(c.isprintable() and not combining(c) and eaw(c) in _ONE_CELL for c in line)
+
+def _joined_line(layout: Dict[str, Any], segs: List[str], attrs: List[int]) -> Optional[str]:
+    """
+    The line's cells joined with their gaps when they share one attribute, else
+    None. Single-width chars only (status glyphs included): a double-width or
+    combining char would shift the columns after it, which per-cell drawing at
+    fixed x positions doesn't.
+    """
+    if attrs.count(attrs[0]) != len(attrs):
+        return None
+    widths, col_starts = layout["widths"], layout["col_starts"]
+    gap = " " * (col_starts[1] - col_starts[0] - widths[0]) if len(widths) > 1 else ""
+    line = gap.join(segs)
+    return line if _single_width(line) else None
+
+def restyle_row(
+    stdscr: "curses._CursesWindow",
+    layout: Dict[str, Any],
+    row_y: List[int],
+    i: int,
+    *,
+    bottom: int,
+    attr: Optional[int] = None,
+    normal_attr: int = 0,
+    style_fn: Optional[Callable[[int,int,str], int]] = None,
+    line_style_fn: Optional[Callable[[int,int,int,str], int]] = None,
+) -> bool:
+    """
+    Re-apply attributes to an already drawn row with chgat (text untouched):
+    `attr` for the whole row (highlight), else its normal per-cell styling.
+    False if the row is not on screen.
+    """
+    if not 0 <= i < len(row_y):
+        return False
+    widths, col_starts = layout["widths"], layout["col_starts"]
+    lines_per_col, texts = layout["wrapped_cells"][i], layout["cell_text"][i]
+    span = col_starts[-1] + widths[-1] - col_starts[0]
+    for k in range(layout["row_heights"][i]):
+        y = row_y[i] + k
+        if y >= bottom:
+            break
+        segs, attrs = [], []
+        for j, lines in enumerate(lines_per_col):
+            segs.append(lines[k][:widths[j]] if k < len(lines) else " " * widths[j])
+            attrs.append(attr if attr is not None else
+                         _cell_attr(i, j, k, texts[j], lines[k].rstrip() if k < len(lines) else "",
+                                    normal_attr, style_fn, line_style_fn))
+        # mirror draw_table: a joined line carries its attribute into the gaps
+        if _joined_line(layout, segs, attrs) is not None:
+            stdscr.chgat(y, col_starts[0], span, attrs[0])
+        else:
+            stdscr.chgat(y, col_starts[0], span, curses.A_NORMAL)   # gaps as erase() left them
+            for j in range(len(segs)):
+                stdscr.chgat(y, col_starts[j], widths[j], attrs[j])
+    return True
+
+def render_table(
+    stdscr: Optional["curses._CursesWindow"],
+    rows: Sequence[Sequence[str]],
+    colspecs: Sequence[ColSpec],
+    *,
+    start_y: int = 0,
+    start_x: int = 0,
+    gap: int = 2,
+    highlight_row: Optional[int] = None,
+    highlight_cell: Optional[Tuple[int,int]] = None,
+    header: Optional[str] = None,          # ignored content; presence means "draw header row"
+    header_attr: int = 0,
+    normal_attr: int = 0,
+    highlight_attr: int = 0,
+    max_height: Optional[int] = None,
+    # NEW: styling hooks (optional)
+    style_fn: Optional[Callable[[int,int,str], int]] = None,           # row, col, full cell text -> attrs
+    line_style_fn: Optional[Callable[[int,int,int,str], int]] = None,  # row, col, line_idx, line_text -> attrs
+    layout: Optional[Dict[str, Any]] = None,   # from compute_layout: skip the layout pass
+) -> Dict[str, Any]:
+    """
+    Draw a wrapping table with curses-safe text (ANSI stripped).
+    Returns layout info: widths, col_starts, row_heights, total_height.
+    """
+    if stdscr is not None:
+        h, w = stdscr.getmaxyx()
+    else:
+        w, h = term_size()
+    if max_height is None: max_height = h - start_y
+    if layout is None:
+        layout = compute_layout(rows, colspecs, w, start_x=start_x, gap=gap)
+    row_y: List[int] = []
+    if stdscr is not None:
+        row_y = draw_table(stdscr, layout, colspecs, start_y=start_y, max_height=max_height,
+                           highlight_row=highlight_row, highlight_cell=highlight_cell,
+                           header=header, header_attr=header_attr, normal_attr=normal_attr,
+                           highlight_attr=highlight_attr, style_fn=style_fn, line_style_fn=line_style_fn)
+    return {**layout, "row_y": row_y}
 
 # ── selector ──────────────────────────────────────────────────────────────────
+_SUBMENU_PROMPT = " Select action (←/→, Enter, Esc):"
+_STATUS_LINE = " ↑/↓ move • Enter select • q/Esc quit • submenu: ←/→ move, Enter"
+
 def grid_select(
     rows: Sequence[Sequence[str]],
     colspecs: Sequence[ColSpec],
@@ -210,8 +379,12 @@ def grid_select(
     # NEW: pass styling hooks through to render_table
     style_fn: Optional[Callable[[int,int,str], int]] = None,
     line_style_fn: Optional[Callable[[int,int,int,str], int]] = None,
+    # rows still streaming in: polled every 100 ms between keys; returns True if
+    # it changed `rows` in place, False if not, None once nothing more will come
+    poll: Optional[Callable[[], Optional[bool]]] = None,
 ) -> Tuple[str, Optional[int], Optional[int]]:
     def inner(stdscr):
+        live = poll
         curses.curs_set(0); curses.use_default_colors()
         # color pairs: 1=highlight bg, 2=cyan, 3=green, 4=red, 5=dim (fallback)
         try:
@@ -228,28 +401,41 @@ def grid_select(
 
         sel_row, mode, sel_sub = 0, "rows", 0
         submenu_items: List[str] = []
+        layout: Optional[Dict[str, Any]] = None
+        drawn: Dict[str, Any] = {}    # last full draw: layout + on-screen row positions
+        table_bottom = 0
+        prev_row: Optional[int] = None  # set when a key only moved the highlight
+        if live: stdscr.timeout(100)
+        cols, gap = max(1, submenu_cols), 3   # submenu grid; cell width follows the screen
 
-        while True:
+        def draw():
+            nonlocal layout, drawn, table_bottom
             stdscr.erase(); h, w = stdscr.getmaxyx()
             y = 0
             if title: stdscr.addnstr(y, 0, title, w, curses.A_BOLD); y += 1
             table_max_h = max(3, h - y - 3)
 
-            layout = render_table(
+            # layout is reused across keystrokes: redone only when rows
+            # stream in (layout reset below) or the screen size changes;
+            # rows below the visible area are never wrapped
+            if layout is None or layout["width"] != w or layout["max_lines"] != table_max_h:
+                layout = compute_layout(rows, colspecs, w, max_lines=table_max_h)
+            drawn = render_table(
                 stdscr, rows, colspecs,
                 start_y=y,
                 highlight_row=sel_row if mode == "rows" else None,
                 header="", header_attr=DIM, normal_attr=NRM, highlight_attr=HIL,
                 max_height=table_max_h,
                 style_fn=style_fn, line_style_fn=line_style_fn,
+                layout=layout,
             )
+            table_bottom = y + table_max_h
             y += min(layout["total_height"], table_max_h)
 
             if mode == "submenu":
-                submenu_items = row_menu_provider(sel_row) if row_menu_provider else []
-                cols = max(1, submenu_cols); gap = 3
+                # submenu_items were fetched for sel_row when the submenu opened
                 cell_w = max(8, (w - (cols-1)*gap)//cols)
-                stdscr.addnstr(y, 0, " Select action (←/→, Enter, Esc):", w, DIM); y += 1
+                stdscr.addnstr(y, 0, _SUBMENU_PROMPT, w, DIM); y += 1
                 rows_needed = (len(submenu_items)+cols-1)//cols
                 for r in range(rows_needed):
                     x = 0
@@ -262,11 +448,32 @@ def grid_select(
                         x += cell_w + gap
                     y += 1
 
-            stdscr.addnstr(h-1, 0, " ↑/↓ move • Enter select • q/Esc quit • submenu: ←/→ move, Enter", w, DIM)
+            stdscr.addnstr(h-1, 0, _STATUS_LINE, w, DIM)
             stdscr.refresh()
 
+        while True:
+            # ↑/↓ alone: flip the old and new rows' attributes in place with
+            # chgat; full redraw for anything else (or a row off screen)
+            if prev_row is not None and (
+                    restyle_row(stdscr, drawn, drawn["row_y"], prev_row, bottom=table_bottom,
+                                normal_attr=NRM, style_fn=style_fn, line_style_fn=line_style_fn)
+                    and restyle_row(stdscr, drawn, drawn["row_y"], sel_row, bottom=table_bottom, attr=HIL)):
+                stdscr.refresh()
+            else:
+                draw()
+            prev_row = None
+
             ch = stdscr.getch()
+            while ch == -1 and live:  # timeout: pick up streamed rows, redraw only on change
+                changed = live()
+                if changed is None:
+                    live = None; stdscr.timeout(-1)
+                if changed: layout = None
+                if changed is not False: break
+                ch = stdscr.getch()
+            if ch == -1: continue
             if mode == "rows":
+                old_row = sel_row
                 if ch in (curses.KEY_UP, ord('k')):   sel_row = max(0, sel_row-1)
                 elif ch in (curses.KEY_DOWN, ord('j')): sel_row = min(len(rows)-1, sel_row+1)
                 elif ch in (10,13):
@@ -275,8 +482,9 @@ def grid_select(
                     else: return ("row-selected", sel_row, None)
                 elif ch in (27, ord('q')): return ("quit", None, None)
                 elif ch == curses.KEY_RESIZE: pass
+                if mode == "rows" and ch != curses.KEY_RESIZE and sel_row != old_row:
+                    prev_row = old_row
             else:
-                cols = max(1, submenu_cols)
                 if ch in (curses.KEY_LEFT, ord('h')):   sel_sub = max(0, sel_sub-1)
                 elif ch in (curses.KEY_RIGHT, ord('l')): sel_sub = min(len(submenu_items)-1, sel_sub+1)
                 elif ch in (curses.KEY_UP, ord('k')):    sel_sub = max(0, sel_sub - cols)
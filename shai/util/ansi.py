@@ -1,24 +1,43 @@
-import re, shutil, sys
+import functools, re, shutil, sys
 
 ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
-def visible_len(s: str) -> int: return len(ANSI_RE.sub("", s))
+def visible_len(s: str) -> int:
+    # most strings carry no escapes at all: a C-level scan, no regex, no cache entry
+    return len(s) if "\x1b" not in s else _styled_len(s)
+
+# styled strings are measured again on every redraw with the same text
+@functools.lru_cache(maxsize=4096)
+def _styled_len(s: str) -> int: return len(ANSI_RE.sub("", s))
 
 def crop_visible(s: str, width: int, ellipsis=True) -> str:
     if width <= 0: return ""
-    vis=i=0; out=[]
-    while i < len(s) and vis < width:
-        if s[i] == "\033":
-            m = ANSI_RE.match(s, i)
-            if m: out.append(m.group(0)); i=m.end(); continue
-        out.append(s[i]); i+=1; vis+=1
-    if ellipsis and visible_len(s) > width and width >= 2:
-        while out and visible_len("".join(out)) >= width: out.pop()
+    if "\x1b" not in s:   # plain text: visible width == len, plain slicing will do
+        if len(s) <= width: return s
+        return s[:width-1] + "…" if ellipsis and width >= 2 else s[:width]
+    # hop from escape to escape, taking the text between them as slices
+    vis=pos=0; out=[]; last_text=-1   # index in `out` of the last text slice
+    for m in ANSI_RE.finditer(s):
+        seg = s[pos:m.start()]
+        if seg:
+            if vis + len(seg) >= width:
+                break
+            last_text = len(out); out.append(seg); vis += len(seg)
+        out.append(m.group(0)); pos = m.end()
+    seg = s[pos:pos + width - vis]
+    if seg:
+        last_text = len(out); out.append(seg); vis += len(seg); pos += len(seg)
+    if ellipsis and width >= 2 and vis >= width and visible_len(s[pos:]) > 0:
+        # drop the trailing escapes and the last visible char to make room
+        del out[last_text + 1:]
+        out[last_text] = out[last_text][:-1]
         out.append("…")
     return "".join(out)
 
 def ljust_visible(s: str, width: int) -> str:
-    pad = max(0, width - visible_len(s))
-    return s + (" " * pad)
+    pad = width - visible_len(s)
+    # a cell that already fills its column is returned as is; otherwise one
+    # C-level ljust builds the padded copy (no separate run of spaces)
+    return s.ljust(len(s) + pad) if pad > 0 else s
 
 USE_COLOR = sys.stdout.isatty()
 def c(txt, code): return f"\033[{code}m{txt}\033[0m" if USE_COLOR else txt
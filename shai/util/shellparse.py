@@ -1,5 +1,5 @@
-import re, shutil
-from typing import List, Dict
+import functools, os, re, shutil
+from typing import List, Dict, Tuple
 
 # Bash built-ins and shell keywords that shouldn't be treated as external commands
 BUILTINS = {
@@ -7,8 +7,14 @@ BUILTINS = {
     "echo", "readonly", "type", "hash", "bg", "fg"
 }
 
-def extract_commands(cmd: str) -> List[str]:
-    parts = re.split(r'[|;&]', cmd)
+_SEP_RE = re.compile(r'[|;&]')
+
+# Binaries a command line runs, in order, builtins skipped. The same command
+# strings come back from streaming, dedupe, cache loads and after installs:
+# parse each once
+@functools.lru_cache(maxsize=512)
+def _commands(cmd: str) -> Tuple[str, ...]:
+    parts = _SEP_RE.split(cmd)
     cmds, seen = [], set()
     for p in parts:
         toks = p.strip().split()
@@ -20,8 +26,34 @@ def extract_commands(cmd: str) -> List[str]:
         if first not in seen:
             seen.add(first)
             cmds.append(first)
-    return cmds
+    return tuple(cmds)
+
+# `shutil.which` walks $PATH and stats every candidate; results are cached per
+# (PATH, generation). Bump the generation after anything that installs binaries.
+_PATH_SIG = hash(os.environ.get("PATH", ""))
+_generation = 0
+
+@functools.lru_cache(maxsize=512)
+def cached_which(binary: str, path_signature: Tuple[int, int]) -> str | None:
+    return shutil.which(binary)
+
+def which(binary: str) -> str | None:
+    return cached_which(binary, (_PATH_SIG, _generation))
+
+def invalidate_which_cache() -> None:
+    global _generation
+    _generation += 1
+    cached_which.cache_clear()
+
+def which_generation() -> int:
+    """Bumped by every invalidate_which_cache(); lets callers key their own caches on it."""
+    return _generation
 
 def which_map(binaries: List[str]) -> Dict[str, str]:
-    return {b: (shutil.which(b) or "") for b in binaries}
+    sig = (_PATH_SIG, _generation)
+    return {b: (cached_which(b, sig) or "") for b in binaries}
+
+def requires_of(cmd: str) -> Dict[str, str]:
+    """Binaries `cmd` runs -> resolved path ("" if missing)."""
+    return which_map(_commands(cmd))
 